@@ -24,7 +24,7 @@ import {
   Activity
 } from 'lucide-react'
 
-const Charts = ({ stats, studentProgress = [], courseProgress = [] }) => {
+const Charts = ({ stats, courseProgress = [] }) => {
   // Datos para el gráfico de barras de entregas
   const submissionData = [
     {
@@ -58,14 +58,8 @@ const Charts = ({ stats, studentProgress = [], courseProgress = [] }) => {
     }
   ]
 
-  // Datos de progreso por curso (simulados si no hay datos reales)
-  const courseChartData = courseProgress.length > 0 ? courseProgress : [
-    { name: 'Fundamentos Web', completion: 85, students: 24 },
-    { name: 'JavaScript Avanzado', completion: 72, students: 22 },
-    { name: 'React & APIs', completion: 68, students: 20 },
-    { name: 'Backend con Node', completion: 45, students: 18 },
-    { name: 'Bases de Datos', completion: 38, students: 16 }
-  ]
+  // Progreso por curso calculado en el servidor ({ name, completion, students })
+  const courseChartData = courseProgress
 
   // Datos de tendencia semanal (simulados)
   const weeklyTrendData = [
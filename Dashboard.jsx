@@ -28,59 +28,51 @@ const Dashboard = () => {
   const [studentProgress, setStudentProgress] = useState([])
   const [courses, setCourses] = useState([])
   const [teachers, setTeachers] = useState([])
+  const [courseProgress, setCourseProgress] = useState([])
   const [filteredProgress, setFilteredProgress] = useState([])
   const [isLoading, setIsLoading] = useState(true)
   const [isSyncing, setIsSyncing] = useState(false)
   const [error, setError] = useState('')
   const [lastSync, setLastSync] = useState(null)
   const [currentFilters, setCurrentFilters] = useState({})
+  const [nextProgressPage, setNextProgressPage] = useState(null)
+  const [nextCoursesPage, setNextCoursesPage] = useState(null)
+  const [nextTeachersPage, setNextTeachersPage] = useState(null)
 
   useEffect(() => {
-    loadUserProfile()
     loadDashboardData()
   }, [])
 
-  const loadUserProfile = async () => {
-    try {
-      const response = await axios.get('http://localhost:8000/api/user/profile/', {
-        withCredentials: true
-      })
-      setUser(response.data)
-    } catch (error) {
-      console.error('Error cargando perfil:', error)
-      setError('No se pudo cargar la información del usuario')
-    }
-  }
+  const progressParams = (filters) => ({
+    search: filters.search || undefined,
+    course_id: filters.course || undefined,
+    cohort: filters.cohort || undefined,
+    teacher_id: filters.teacher || undefined,
+    status: filters.status || undefined
+  })
 
   const loadDashboardData = async () => {
     try {
       setIsLoading(true)
       
-      // Cargar estadísticas
-      const statsResponse = await axios.get('http://localhost:8000/api/dashboard/stats/', {
-        withCredentials: true
-      })
-      setStats(statsResponse.data)
-
-      // Cargar progreso de estudiantes
-      const progressResponse = await axios.get('http://localhost:8000/api/students/progress/', {
+      // Perfil, estadísticas, primera página de progreso y opciones de filtros en una sola petición
+      const response = await axios.get('http://localhost:8000/api/dashboard/bootstrap/', {
+        params: progressParams(currentFilters),
         withCredentials: true
       })
-      setStudentProgress(progressResponse.data)
-      setFilteredProgress(progressResponse.data)
+      const { user, stats, progress, courses, teachers } = response.data
 
-      // Cargar cursos
-      const coursesResponse = await axios.get('http://localhost:8000/api/courses/', {
-        withCredentials: true
-      })
-      setCourses(coursesResponse.data)
+      setUser(user)
+      setStats(stats)
+      setStudentProgress(progress.results)
+      setFilteredProgress(progress.results)
+      setNextProgressPage(progress.next)
+      setCourses(courses.results)
+      setNextCoursesPage(courses.next)
+      setTeachers(teachers.results)
+      setNextTeachersPage(teachers.next)
 
-      // Simular datos de profesores (en una implementación real vendría de la API)
-      setTeachers([
-        { id: 1, google_name: 'Prof. María García' },
-        { id: 2, google_name: 'Prof. Juan Pérez' },
-        { id: 3, google_name: 'Prof. Ana López' }
-      ])
+      await loadCourseProgress(currentFilters)
       
     } catch (error) {
       console.error('Error cargando datos:', error)
@@ -90,15 +82,58 @@ const Dashboard = () => {
     }
   }
 
-  const handleSync = async () => {
+  // Las estadísticas y el progreso por curso solo admiten los filtros de cohorte y profesor
+  const aggregateParams = (filters) => ({
+    cohort: filters.cohort || undefined,
+    teacher_id: filters.teacher || undefined
+  })
+
+  // Los agregados se calculan en el servidor sobre todos los estudiantes, no sobre la página cargada
+  const loadStats = async (filters) => {
+    const response = await axios.get('http://localhost:8000/api/dashboard/stats/', {
+      params: aggregateParams(filters),
+      withCredentials: true
+    })
+    setStats(response.data)
+  }
+
+  // Progreso agregado por curso, calculado en el servidor a partir del resumen de progreso
+  const loadCourseProgress = async (filters) => {
+    const response = await axios.get('http://localhost:8000/api/courses/progress/', {
+      params: aggregateParams(filters),
+      withCredentials: true
+    })
+    setCourseProgress(response.data.map(course => ({
+      name: course.course_name,
+      completion: course.completion_percentage,
+      students: course.students_count
+    })))
+  }
+
+  // La sincronización incremental trae las entregas y notas nuevas y las tareas que cambiaron; la completa recorre todas las tareas
+  const handleSync = async (fullResync = false) => {
     setIsSyncing(true)
     setError('')
     
     try {
-      const response = await axios.post('http://localhost:8000/api/sync/classroom/', {}, {
+      const response = await axios.post('http://localhost:8000/api/sync/classroom/', { full_resync: fullResync }, {
         withCredentials: true
       })
-      
+
+      // Consultar el estado del trabajo hasta que termine
+      let job = response.data
+      while (job.status === 'pending' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 2000))
+        const statusResponse = await axios.get(`http://localhost:8000/api/sync/jobs/${response.data.job_id}/`, {
+          withCredentials: true
+        })
+        job = statusResponse.data
+      }
+
+      if (job.status === 'error') {
+        throw new Error(job.message)
+      }
+
       setLastSync(new Date())
       await loadDashboardData() // Recargar datos después de sincronizar
       
@@ -110,53 +145,67 @@ const Dashboard = () => {
     }
   }
 
-  const handleFiltersChange = useCallback((filters) => {
+  // Los filtros se aplican en el servidor; cada respuesta trae una página y el cursor siguiente
+  const loadStudentProgress = async (filters, pageUrl = null) => {
+    const params = pageUrl ? {} : progressParams(filters)
+    const response = await axios.get(pageUrl || 'http://localhost:8000/api/students/progress/', {
+      params,
+      withCredentials: true
+    })
+
+    const results = response.data.results
+    setStudentProgress(previous => pageUrl ? [...previous, ...results] : results)
+    setFilteredProgress(previous => pageUrl ? [...previous, ...results] : results)
+    setNextProgressPage(response.data.next)
+  }
+
+  const handleFiltersChange = useCallback(async (filters) => {
     setCurrentFilters(filters)
-    
-    // Aplicar filtros al progreso de estudiantes
-    let filtered = [...studentProgress]
-    
-    if (filters.search) {
-      filtered = filtered.filter(student => 
-        student.student_name.toLowerCase().includes(filters.search.toLowerCase()) ||
-        student.student_email.toLowerCase().includes(filters.search.toLowerCase())
-      )
+
+    try {
+      await Promise.all([
+        loadStudentProgress(filters),
+        loadStats(filters),
+        loadCourseProgress(filters)
+      ])
+    } catch (error) {
+      console.error('Error filtrando progreso:', error)
+      setError('No se pudo filtrar el progreso de estudiantes')
     }
-    
-    if (filters.course) {
-      filtered = filtered.filter(student => student.course_id === parseInt(filters.course))
+  }, [])
+
+  const loadMoreProgress = async () => {
+    try {
+      await loadStudentProgress(currentFilters, nextProgressPage)
+    } catch (error) {
+      console.error('Error cargando más estudiantes:', error)
+      setError('No se pudieron cargar más estudiantes')
     }
-    
-    if (filters.status) {
-      filtered = filtered.filter(student => {
-        switch (filters.status) {
-          case 'completed':
-            return student.completion_percentage === 100
-          case 'pending':
-            return student.completion_percentage === 0
-          case 'late':
-            return student.late_assignments > 0
-          case 'in_progress':
-            return student.completion_percentage > 0 && student.completion_percentage < 100
-          default:
-            return true
-        }
-      })
+  }
+
+  // Las opciones de los filtros llegan paginadas; las siguientes páginas se piden bajo demanda
+  const loadMoreOptions = async (pageUrl, setOptions, setNextPage) => {
+    try {
+      const response = await axios.get(pageUrl, { withCredentials: true })
+      setOptions(previous => [...previous, ...response.data.results])
+      setNextPage(response.data.next)
+    } catch (error) {
+      console.error('Error cargando opciones de filtros:', error)
+      setError('No se pudieron cargar más opciones de filtros')
     }
-    
-    setFilteredProgress(filtered)
-  }, [studentProgress])
+  }
 
   const exportData = () => {
-    // Simular exportación de datos
-    const dataStr = JSON.stringify(filteredProgress, null, 2)
-    const dataUri = 'data:application/json;charset=utf-8,'+ encodeURIComponent(dataStr)
-    
-    const exportFileDefaultName = `e-campus-reporte-${new Date().toISOString().split('T')[0]}.json`
-    
+    // El servidor genera el CSV completo con los filtros actuales y lo envía en streaming
+    const params = new URLSearchParams()
+    if (currentFilters.search) params.append('search', currentFilters.search)
+    if (currentFilters.course) params.append('course_id', currentFilters.course)
+    if (currentFilters.cohort) params.append('cohort', currentFilters.cohort)
+    if (currentFilters.teacher) params.append('teacher_id', currentFilters.teacher)
+    if (currentFilters.status) params.append('status', currentFilters.status)
+
     const linkElement = document.createElement('a')
-    linkElement.setAttribute('href', dataUri)
-    linkElement.setAttribute('download', exportFileDefaultName)
+    linkElement.setAttribute('href', `http://localhost:8000/api/export/progress/?${params.toString()}`)
     linkElement.click()
   }
 
@@ -213,7 +262,18 @@ const Dashboard = () => {
             </Button>
             
             <Button 
-              onClick={handleSync}
+              onClick={() => handleSync(true)}
+              disabled={isSyncing}
+              variant="outline"
+              size="sm"
+              title="Volver a descargar todas las tareas, entregas y notas"
+            >
+              <RefreshCw className="w-4 h-4 mr-2" />
+              Sincronización completa
+            </Button>
+            
+            <Button 
+              onClick={() => handleSync()}
               disabled={isSyncing}
               variant="outline"
               size="sm"
@@ -296,6 +356,8 @@ const Dashboard = () => {
           onFiltersChange={handleFiltersChange}
           courses={courses}
           teachers={teachers}
+          onLoadMoreCourses={nextCoursesPage && (() => loadMoreOptions(nextCoursesPage, setCourses, setNextCoursesPage))}
+          onLoadMoreTeachers={nextTeachersPage && (() => loadMoreOptions(nextTeachersPage, setTeachers, setNextTeachersPage))}
         />
 
         {/* Tabs para diferentes vistas */}
@@ -308,7 +370,7 @@ const Dashboard = () => {
 
           <TabsContent value="overview" className="space-y-6">
             {/* Gráficos */}
-            <Charts stats={stats} studentProgress={filteredProgress} />
+            <Charts stats={stats} courseProgress={courseProgress} />
 
             {/* Estadísticas de entregas */}
             {stats && (
@@ -366,14 +428,12 @@ const Dashboard = () => {
                     <CardDescription>
                       Estado detallado del progreso académico por estudiante
                       {Object.keys(currentFilters).some(key => currentFilters[key]) && (
-                        <span className="ml-2">
-                          ({filteredProgress.length} de {studentProgress.length} estudiantes)
-                        </span>
+                        <span className="ml-2">(filtrado)</span>
                       )}
                     </CardDescription>
                   </div>
                   <Badge variant="outline">
-                    {filteredProgress.length} estudiantes
+                    {filteredProgress.length}{nextProgressPage ? '+' : ''} estudiantes
                   </Badge>
                 </div>
               </CardHeader>
@@ -431,6 +491,14 @@ const Dashboard = () => {
                         </div>
                       </div>
                     ))}
+
+                    {nextProgressPage && (
+                      <div className="text-center">
+                        <Button onClick={loadMoreProgress} variant="outline" size="sm">
+                          Cargar más
+                        </Button>
+                      </div>
+                    )}
                   </div>
                 ) : (
                   <div className="text-center py-8 text-gray-500">
@@ -444,7 +512,7 @@ const Dashboard = () => {
           </TabsContent>
 
           <TabsContent value="analytics" className="space-y-6">
-            <Charts stats={stats} studentProgress={filteredProgress} />
+            <Charts stats={stats} courseProgress={courseProgress} />
           </TabsContent>
         </Tabs>
 
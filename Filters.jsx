@@ -16,7 +16,7 @@ import {
   GraduationCap
 } from 'lucide-react'
 
-const Filters = ({ onFiltersChange, courses = [], teachers = [] }) => {
+const Filters = ({ onFiltersChange, courses = [], teachers = [], onLoadMoreCourses, onLoadMoreTeachers }) => {
   const [filters, setFilters] = useState({
     cohort: '',
     course: '',
@@ -150,6 +150,11 @@ const Filters = ({ onFiltersChange, courses = [], teachers = [] }) => {
                 ))}
               </SelectContent>
             </Select>
+            {onLoadMoreCourses && (
+              <Button onClick={onLoadMoreCourses} variant="ghost" size="sm" className="w-full">
+                Cargar más cursos
+              </Button>
+            )}
           </div>
 
           {/* Profesor */}
@@ -170,6 +175,11 @@ const Filters = ({ onFiltersChange, courses = [], teachers = [] }) => {
                 ))}
               </SelectContent>
             </Select>
+            {onLoadMoreTeachers && (
+              <Button onClick={onLoadMoreTeachers} variant="ghost" size="sm" className="w-full">
+                Cargar más profesores
+              </Button>
+            )}
           </div>
         </div>
 
@@ -1,6 +1,55 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog
+from .models import (
+    User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog, SyncJob,
+    StudentCourseProgress
+)
+from .caching import invalidate_dashboard_cache
+from .progress import refresh_course_progress
+
+
+class DashboardCacheAdminMixin:
+    """Recalcular el progreso e invalidar la caché del dashboard al editar desde el admin
+
+    `dashboard_cohort_field` es la ruta desde el modelo hasta la cohorte
+    de su curso y `progress_course_field` hasta el ID del curso cuyo
+    resumen de progreso depende del objeto (None si no afecta al resumen).
+    """
+    dashboard_cohort_field = 'course__cohort'
+    progress_course_field = 'course_id'
+    
+    def get_dashboard_scope(self, queryset):
+        """Cohortes y cursos afectados por los objetos del queryset"""
+        fields = [self.dashboard_cohort_field]
+        if self.progress_course_field:
+            fields.append(self.progress_course_field)
+        rows = list(queryset.values_list(*fields))
+        return {row[0] for row in rows}, {row[1] for row in rows if len(row) > 1}
+    
+    def refresh_dashboard(self, cohorts, course_ids):
+        # Las estadísticas se leen del resumen: recalcularlo antes de invalidar la caché
+        for course_id in sorted(course_ids):
+            refresh_course_progress(course_id)
+        invalidate_dashboard_cache(cohorts)
+    
+    def save_model(self, request, obj, form, change):
+        # Si el objeto cambia de cohorte (o de curso) también cambia la anterior
+        cohorts, course_ids = set(), set()
+        if change:
+            cohorts, course_ids = self.get_dashboard_scope(self.model.objects.filter(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+        new_cohorts, new_course_ids = self.get_dashboard_scope(self.model.objects.filter(pk=obj.pk))
+        self.refresh_dashboard(cohorts | new_cohorts, course_ids | new_course_ids)
+    
+    def delete_model(self, request, obj):
+        cohorts, course_ids = self.get_dashboard_scope(self.model.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+        self.refresh_dashboard(cohorts, course_ids)
+    
+    def delete_queryset(self, request, queryset):
+        cohorts, course_ids = self.get_dashboard_scope(queryset)
+        super().delete_queryset(request, queryset)
+        self.refresh_dashboard(cohorts, course_ids)
 
 
 @admin.register(User)
@@ -21,11 +70,14 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(DashboardCacheAdminMixin, admin.ModelAdmin):
+    dashboard_cohort_field = 'cohort'
+    # Cohorte y estado no cambian el resumen; al borrar, sus filas se borran en cascada
+    progress_course_field = None
     list_display = ('name', 'section', 'cohort', 'course_state', 'is_active', 'creation_time')
     list_filter = ('course_state', 'is_active', 'cohort', 'creation_time')
     search_fields = ('name', 'section', 'description')
-    readonly_fields = ('google_course_id', 'owner_id', 'creation_time', 'update_time', 'alternate_link')
+    readonly_fields = ('google_course_id', 'owner_id', 'creation_time', 'update_time', 'alternate_link', 'coursework_watermark')
     
     fieldsets = (
         ('Información básica', {
@@ -35,7 +87,7 @@ class CourseAdmin(admin.ModelAdmin):
             'fields': ('course_state', 'is_active')
         }),
         ('Información de Google Classroom', {
-            'fields': ('google_course_id', 'owner_id', 'enrollment_code', 'alternate_link'),
+            'fields': ('google_course_id', 'owner_id', 'enrollment_code', 'alternate_link', 'coursework_watermark'),
             'classes': ('collapse',)
         }),
         ('Fechas', {
@@ -46,7 +98,7 @@ class CourseAdmin(admin.ModelAdmin):
 
 
 @admin.register(CourseEnrollment)
-class CourseEnrollmentAdmin(admin.ModelAdmin):
+class CourseEnrollmentAdmin(DashboardCacheAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'course', 'role', 'created_at')
     list_filter = ('role', 'created_at', 'course__cohort')
     search_fields = ('user__google_name', 'user__google_email', 'course__name')
@@ -56,7 +108,7 @@ class CourseEnrollmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(CourseWork)
-class CourseWorkAdmin(admin.ModelAdmin):
+class CourseWorkAdmin(DashboardCacheAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'course', 'work_type', 'state', 'due_date', 'max_points')
     list_filter = ('work_type', 'state', 'course__cohort', 'due_date')
     search_fields = ('title', 'description', 'course__name')
@@ -81,7 +133,9 @@ class CourseWorkAdmin(admin.ModelAdmin):
 
 
 @admin.register(StudentSubmission)
-class StudentSubmissionAdmin(admin.ModelAdmin):
+class StudentSubmissionAdmin(DashboardCacheAdminMixin, admin.ModelAdmin):
+    dashboard_cohort_field = 'coursework__course__cohort'
+    progress_course_field = 'coursework__course_id'
     list_display = ('user', 'coursework', 'state', 'late', 'assigned_grade', 'update_time')
     list_filter = ('state', 'late', 'coursework__course__cohort', 'update_time')
     search_fields = ('user__google_name', 'user__google_email', 'coursework__title')
@@ -108,21 +162,57 @@ class StudentSubmissionAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'coursework', 'coursework__course')
 
 
+@admin.register(StudentCourseProgress)
+class StudentCourseProgressAdmin(DashboardCacheAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'course', 'turned_in_count', 'total_assignments', 'late_count', 'missing_count', 'updated_at')
+    list_filter = ('course__cohort', 'updated_at')
+    search_fields = ('user__google_name', 'user__google_email', 'course__name')
+    readonly_fields = (
+        'course', 'user', 'total_assignments', 'submissions_count', 'turned_in_count',
+        'late_count', 'pending_count', 'missing_count', 'graded_count', 'grade_sum', 'updated_at'
+    )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'course')
+
+
 @admin.register(SyncLog)
 class SyncLogAdmin(admin.ModelAdmin):
-    list_display = ('user', 'sync_type', 'status', 'items_processed', 'created_at')
+    list_display = (
+        'user', 'course', 'sync_type', 'status', 'items_processed',
+        'duration_seconds', 'api_calls', 'pages', 'throttled_seconds', 'created_at'
+    )
     list_filter = ('sync_type', 'status', 'created_at')
-    search_fields = ('user__google_name', 'user__google_email', 'message')
-    readonly_fields = ('created_at',)
+    search_fields = ('user__google_name', 'user__google_email', 'course__name', 'message')
+    readonly_fields = ('created_at', 'started_at')
+    raw_id_fields = ('job', 'course')
+    date_hierarchy = 'created_at'
     
     fieldsets = (
         ('Información básica', {
-            'fields': ('user', 'sync_type', 'status', 'items_processed')
+            'fields': ('user', 'job', 'course', 'sync_type', 'status', 'items_processed')
+        }),
+        ('Telemetría', {
+            'fields': (
+                'items_inserted', 'items_updated', 'items_unchanged', 'api_calls', 'pages',
+                'throttled_seconds', 'duration_seconds', 'started_at'
+            )
         }),
         ('Detalles', {
             'fields': ('message', 'created_at')
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'course')
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'scope', 'courses_processed', 'courses_total', 'courses_skipped', 'api_calls', 'throttled_seconds', 'created_at', 'finished_at')
+    list_filter = ('status', 'scope', 'created_at')
+    search_fields = ('user__google_name', 'user__google_email', 'task_id', 'message')
+    readonly_fields = ('id', 'task_id', 'created_at', 'started_at', 'finished_at')
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user')
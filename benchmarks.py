@@ -0,0 +1,314 @@
+"""Banco de pruebas de rendimiento de la sincronización y del dashboard
+
+Cada escala se siembra sincronizando contra el servidor simulado de
+Classroom (fake_classroom), en una base de datos de pruebas que se crea y
+se destruye para la ejecución. Para cada endpoint se miden percentiles de
+latencia, número de consultas SQL y pico de memoria; la sincronización se
+mide completa y en modo incremental sin cambios.
+
+Los resultados se comparan con una línea base guardada y con el número de
+consultas de la escala más pequeña: si un endpoint hace más consultas al
+crecer los datos hay un N+1.
+"""
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.utils import timezone
+from .fake_classroom import FakeClassroomServer, FakeTenant
+from .models import User
+from .sync import ClassroomSync
+
+
+# Tamaño de la escala 1x; las demás multiplican cursos, alumnos y profesores
+BASE_TENANT = {
+    'courses': 5,
+    'students': 150,
+    'teachers': 10,
+    'students_per_course': 30,
+    'teachers_per_course': 2,
+    'coursework_per_course': 10,
+}
+
+SCALES = {'1x': 1, '10x': 10, '100x': 100}
+
+ENDPOINTS = [
+    ('dashboard_stats', '/api/dashboard/stats/', {}),
+    ('student_progress', '/api/students/progress/', {}),
+    ('student_progress_search', '/api/students/progress/', {'search': 'Alumno 1', 'status': 'late'}),
+    ('courses', '/api/courses/', {}),
+    ('course_progress', '/api/courses/progress/', {}),
+    ('teachers', '/api/teachers/', {}),
+    ('dashboard_bootstrap', '/api/dashboard/bootstrap/', {}),
+]
+
+# Máximo de consultas por petición, independiente de la escala. Son las
+# medidas con `manage.py benchmark --scales 1x,10x` (incluyen las dos de
+# sesión y usuario): cualquier consulta de más es una regresión.
+ENDPOINT_QUERY_BUDGETS = {
+    'dashboard_stats': 7,
+    'student_progress': 4,
+    'student_progress_search': 4,
+    'courses': 4,
+    'course_progress': 4,
+    'teachers': 3,
+    'dashboard_bootstrap': 9,
+}
+# Margen sobre las consultas por curso de la escala 1x en la sincronización
+SYNC_QUERIES_PER_COURSE_SLACK = 1.5
+
+
+class QueryCounter:
+    """Contar las consultas SQL de todos los hilos mientras está activo
+
+    La sincronización usa una conexión por hilo, así que el contador se
+    instala también en cada conexión que se abra dentro del bloque.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def _install(self, sender=None, connection=None, **kwargs):
+        # La sincronización cierra la conexión del hilo tras cada curso y el
+        # pool reutiliza los hilos: al reconectar, el contador ya está instalado
+        if self in connection.execute_wrappers:
+            return
+        connection.execute_wrappers.append(self)
+        if connection not in self._connections:
+            self._connections.append(connection)
+
+    def __enter__(self):
+        self._install(connection=connections[DEFAULT_DB_ALIAS])
+        connection_created.connect(self._install)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._install)
+        for connection in self._connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+def percentile(values, fraction):
+    """Percentil por el método del rango más cercano"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, iterations=1, warmup=0, repeatable=True):
+    """Medir latencia, consultas y pico de memoria de `func`
+
+    Si `func` se puede repetir sin cambiar el estado (las peticiones de
+    solo lectura), el pico de memoria se mide en una ejecución aparte
+    porque tracemalloc ralentiza el código y distorsionaría las latencias.
+    Si no (la sincronización), se mide durante la única ejecución, que
+    incluye entonces la sobrecarga de tracemalloc.
+    """
+    if not repeatable and (iterations != 1 or warmup):
+        raise ValueError('Una medida no repetible admite una sola ejecución')
+
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    queries = 0
+    peak = None
+    for _ in range(iterations):
+        with QueryCounter() as counter:
+            if not repeatable:
+                tracemalloc.start()
+            try:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+                if not repeatable:
+                    peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                if not repeatable:
+                    tracemalloc.stop()
+        queries = max(queries, counter.count)
+
+    if peak is None:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def scaled_tenant(factor, seed=1):
+    return FakeTenant(seed=seed, **{
+        name: value * factor if name in ('courses', 'students', 'teachers') else value
+        for name, value in BASE_TENANT.items()
+    })
+
+
+class BenchmarkRunner:
+    """Ejecutar el banco de pruebas; debe llamarse con una base de datos de pruebas activa"""
+
+    def __init__(self, scales, iterations=20, warmup=2, latency=0.0, log=print):
+        self.scales = scales
+        self.iterations = iterations
+        self.warmup = warmup
+        self.latency = latency
+        self.log = log
+
+    def run(self):
+        results = {}
+        for scale in self.scales:
+            self.log(f'Escala {scale}')
+            call_command('flush', interactive=False, verbosity=0)
+            cache.clear()
+            results[scale] = self.run_scale(scaled_tenant(SCALES[scale]))
+        return results
+
+    def run_scale(self, tenant):
+        server = FakeClassroomServer(('127.0.0.1', 0), tenant, latency=self.latency)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        try:
+            with override_settings(
+                GOOGLE_API_ROOT_URL=f'{url}/',
+                GOOGLE_TOKEN_URI=f'{url}/token',
+                # El servidor local no tiene cuotas
+                CLASSROOM_PROJECT_QPS=10 ** 6,
+                CLASSROOM_USER_QPS=10 ** 6,
+                # La pasada incremental debe recorrer los cursos recién sincronizados
+                CLASSROOM_SYNC_FRESHNESS_SECONDS=0,
+            ):
+                results = self.run_sync(tenant)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        results.update(self.run_endpoints())
+        return results
+
+    def run_sync(self, tenant):
+        user = User.objects.create(
+            username='benchmark@ejemplo.edu',
+            google_id='benchmark',
+            access_token='benchmark-token',
+            refresh_token='benchmark-refresh',
+            token_expires_at=timezone.now() + timedelta(days=1),
+        )
+        results = {}
+        for name, full_resync in (('sync_full', True), ('sync_incremental', False)):
+            def sync():
+                classroom_sync = ClassroomSync(user, full_resync=full_resync)
+                classroom_sync.run()
+                if classroom_sync.errors:
+                    raise AssertionError(f'La sincronización terminó con errores: {classroom_sync.errors}')
+
+            # Cada pasada cambia los datos: una sola ejecución mide todo
+            sync_results = measure(sync, repeatable=False)
+            sync_results['queries_per_course'] = round(sync_results['queries'] / tenant.courses, 2)
+            results[name] = sync_results
+            self.log(f'  {name}: {self.format(sync_results)}')
+        return results
+
+    def run_endpoints(self):
+        client = Client()
+        client.force_login(User.objects.get(username='benchmark@ejemplo.edu'))
+
+        results = {}
+        for name, path, params in ENDPOINTS:
+            def request():
+                # Medir el cálculo, no la caché del dashboard
+                cache.clear()
+                response = client.get(path, params)
+                if response.status_code != 200:
+                    raise AssertionError(f'{path} respondió {response.status_code}')
+
+            results[name] = measure(request, iterations=self.iterations, warmup=self.warmup)
+            self.log(f'  {name}: {self.format(results[name])}')
+        return results
+
+    @staticmethod
+    def format(metrics):
+        return (
+            f"p50 {metrics['p50_ms']} ms, p95 {metrics['p95_ms']} ms, "
+            f"{metrics['queries']} consultas, pico {metrics['peak_kb']} KB"
+        )
+
+
+def check_budgets(results):
+    """Fallos por consultas que superan el presupuesto o crecen con la escala"""
+    failures = []
+    smallest = min(results, key=lambda scale: SCALES[scale])
+
+    for scale, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            budget = ENDPOINT_QUERY_BUDGETS.get(name)
+            if budget is not None and metrics['queries'] > budget:
+                failures.append(f'{scale} {name}: {metrics["queries"]} consultas (presupuesto {budget})')
+
+            reference = results[smallest].get(name)
+            if reference is None or scale == smallest:
+                continue
+            if name in ENDPOINT_QUERY_BUDGETS and metrics['queries'] > reference['queries']:
+                failures.append(
+                    f'{scale} {name}: {metrics["queries"]} consultas frente a {reference["queries"]} '
+                    f'en {smallest} (posible N+1)'
+                )
+            if 'queries_per_course' in metrics:
+                limit = reference['queries_per_course'] * SYNC_QUERIES_PER_COURSE_SLACK
+                if metrics['queries_per_course'] > limit:
+                    failures.append(
+                        f'{scale} {name}: {metrics["queries_per_course"]} consultas por curso '
+                        f'(límite {limit:.2f} según {smallest})'
+                    )
+    return failures
+
+
+def compare_with_baseline(results, baseline, latency_tolerance=0.25, memory_tolerance=0.25):
+    """Fallos respecto a una línea base guardada con `save_results`"""
+    failures = []
+    for scale, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            reference = baseline.get(scale, {}).get(name)
+            if reference is None:
+                continue
+            if metrics['queries'] > reference['queries']:
+                failures.append(f'{scale} {name}: {metrics["queries"]} consultas (línea base {reference["queries"]})')
+            if metrics['p95_ms'] > reference['p95_ms'] * (1 + latency_tolerance):
+                failures.append(f'{scale} {name}: p95 {metrics["p95_ms"]} ms (línea base {reference["p95_ms"]} ms)')
+            if metrics['peak_kb'] > reference['peak_kb'] * (1 + memory_tolerance):
+                failures.append(f'{scale} {name}: pico {metrics["peak_kb"]} KB (línea base {reference["peak_kb"]} KB)')
+    return failures
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as results_file:
+        return json.load(results_file)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
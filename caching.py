@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+ALL_COHORTS = '*'
+
+# Momento de la última invalidación, para el Last-Modified de las vistas condicionales
+CHANGED_AT_KEY = 'dashboard:changed_at'
+
+
+def _generation_key(cohort):
+    return f'dashboard:generation:{cohort or ALL_COHORTS}'
+
+
+def _get_generation(cohort):
+    return cache.get_or_set(_generation_key(cohort), 1, timeout=None)
+
+
+def dashboard_cache_key(name, cohort=None, teacher_id=None):
+    """Clave de caché para una combinación de filtros del dashboard
+
+    La clave incluye la generación de la cohorte filtrada (o la global si
+    no hay cohorte), de modo que invalidar una cohorte no afecta a las
+    respuestas cacheadas de las demás.
+    """
+    generation = _get_generation(cohort)
+    return f'dashboard:{name}:{generation}:{cohort or ALL_COHORTS}:{teacher_id or ALL_COHORTS}'
+
+
+def dashboard_data_version():
+    """Generación global y momento del último cambio de los datos del dashboard
+
+    La generación global se incrementa con cada invalidación, sea de una
+    sincronización, de `rebuild_progress` o de una edición en el admin.
+    """
+    return _get_generation(None), cache.get(CHANGED_AT_KEY)
+
+
+def get_dashboard_cache(name, cohort=None, teacher_id=None):
+    return cache.get(dashboard_cache_key(name, cohort, teacher_id))
+
+
+def set_dashboard_cache(name, value, cohort=None, teacher_id=None):
+    cache.set(
+        dashboard_cache_key(name, cohort, teacher_id),
+        value,
+        timeout=settings.DASHBOARD_CACHE_TIMEOUT
+    )
+
+
+def invalidate_dashboard_cache(cohorts):
+    """Invalidar las respuestas cacheadas de las cohortes indicadas
+
+    Las respuestas sin filtro de cohorte incluyen todos los cursos, así que
+    su generación se incrementa siempre.
+    """
+    for cohort in set(cohorts) | {ALL_COHORTS}:
+        key = _generation_key(cohort)
+        cache.add(key, 1, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # La clave expiró entre add e incr
+            cache.set(key, 2, timeout=None)
+    cache.set(CHANGED_AT_KEY, timezone.now(), timeout=None)
@@ -0,0 +1,9 @@
+import os
+from celery import Celery
+
+# Configurar el módulo de settings por defecto para Celery
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecampus_project.settings')
+
+app = Celery('ecampus_project')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,119 @@
+from django.conf import settings
+from .quota import QuotaScheduler
+
+
+# Máximo de llamadas que la API de Classroom acepta en una petición batch
+CLASSROOM_BATCH_LIMIT = 50
+
+# Tamaño de página por endpoint, indexado por el campo que contiene los elementos.
+# El servidor recorta los valores por encima de su máximo, así que pedir el
+# máximo reduce el número de viajes; se puede ajustar con CLASSROOM_PAGE_SIZES.
+DEFAULT_PAGE_SIZES = {
+    'courses': 1000,
+    'students': 1000,
+    'teachers': 1000,
+    'courseWork': 1000,
+    'studentSubmissions': 1000,
+}
+
+
+def get_page_size(items_field):
+    """Tamaño de página configurado para un endpoint"""
+    page_sizes = {**DEFAULT_PAGE_SIZES, **getattr(settings, 'CLASSROOM_PAGE_SIZES', {})}
+    return page_sizes.get(items_field)
+
+
+def iter_pages(method, items_field, page_size=None, scheduler=None, **params):
+    """Recorrer todas las páginas de una llamada list de Classroom
+
+    `method` es el método list sin invocar, por ejemplo
+    `service.courses().students().list`. Cada página se entrega en cuanto
+    llega, de modo que la memoria no crece con el tamaño del listado. Las
+    peticiones pasan por `scheduler` (cuota y reintentos).
+    """
+    scheduler = scheduler or QuotaScheduler()
+    page_size = page_size or get_page_size(items_field)
+    page_token = None
+
+    while True:
+        response = scheduler.execute(method(pageSize=page_size, pageToken=page_token, **params))
+        scheduler.record_page()
+        yield response.get(items_field, [])
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+
+def iter_items(method, items_field, page_size=None, scheduler=None, **params):
+    """Recorrer uno a uno los elementos de todas las páginas"""
+    for page in iter_pages(method, items_field, page_size=page_size, scheduler=scheduler, **params):
+        yield from page
+
+
+class BatchLister:
+    """Agrupar llamadas list de Classroom en peticiones batch multipart
+
+    Cada llamada se registra junto al callback que procesa sus páginas;
+    al ejecutar, las llamadas se envían en lotes y cada respuesta se
+    enruta de vuelta a su callback. Si una respuesta trae `nextPageToken`,
+    la página siguiente se pide en el próximo lote. Las llamadas que fallan
+    con un error transitorio se reintentan en un lote posterior tras el
+    backoff que indique `scheduler`.
+    """
+
+    def __init__(self, service, batch_size=None, scheduler=None):
+        self.service = service
+        self.scheduler = scheduler or QuotaScheduler()
+        self.batch_size = min(batch_size or settings.CLASSROOM_BATCH_SIZE, CLASSROOM_BATCH_LIMIT)
+        self._pending = []
+
+    def add(self, method, items_field, callback, key=None, page_size=None, **params):
+        """Registrar una llamada list; `callback(items)` recibe cada página"""
+        params['pageSize'] = page_size or get_page_size(items_field)
+        self._pending.append((method, items_field, callback, key, params, 0))
+
+    def execute(self):
+        """Enviar las llamadas pendientes y devolver los fallos como (key, excepción)"""
+        failures = []
+
+        while self._pending:
+            chunk = self._pending[:self.batch_size]
+            self._pending = self._pending[self.batch_size:]
+            routes = {}
+            retry_delays = [0.0]
+
+            def on_response(request_id, response, exception):
+                method, items_field, callback, key, params, attempt = routes[request_id]
+                if exception is not None:
+                    delay = self.scheduler.retry_delay(exception, attempt)
+                    if delay is None:
+                        failures.append((key, exception))
+                    else:
+                        retry_delays.append(delay)
+                        self._pending.append((method, items_field, callback, key, params, attempt + 1))
+                    return
+                self.scheduler.record_page()
+                try:
+                    callback(response.get(items_field, []))
+                except Exception as e:
+                    failures.append((key, e))
+                    return
+
+                # Pedir la página siguiente en el próximo lote
+                page_token = response.get('nextPageToken')
+                if page_token:
+                    self._pending.append(
+                        (method, items_field, callback, key, {**params, 'pageToken': page_token}, 0)
+                    )
+
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index, call in enumerate(chunk):
+                method, items_field, callback, key, params, attempt = call
+                request_id = str(index)
+                routes[request_id] = call
+                batch.add(method(**params), request_id=request_id)
+            self.scheduler.execute(batch, calls=len(chunk))
+            self.scheduler.backoff(max(retry_delays))
+
+        return failures
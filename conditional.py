@@ -0,0 +1,76 @@
+import hashlib
+import json
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .caching import dashboard_data_version
+from .models import SyncJob
+
+
+def last_sync_time():
+    """Momento en que terminó la última sincronización
+
+    Cuenta también las que acabaron con error: pueden haber escrito datos
+    antes de fallar, así que cambian lo que devuelve el dashboard.
+    """
+    return SyncJob.objects.filter(finished_at__isnull=False).aggregate(
+        value=Max('finished_at')
+    )['value']
+
+
+def last_data_change():
+    """Versión y momento del último cambio de los datos del dashboard
+
+    Además de las sincronizaciones cuenta las invalidaciones de la caché
+    del dashboard (`rebuild_progress`, ediciones en el admin), que cambian
+    la respuesta sin que termine ninguna sincronización.
+    """
+    version, changed_at = dashboard_data_version()
+    last_modified = last_sync_time()
+    if changed_at and (last_modified is None or changed_at > last_modified):
+        last_modified = changed_at
+    return version, last_modified
+
+
+def sync_etag(path, version, last_modified, params):
+    """ETag a partir de la versión de los datos y los filtros de la petición"""
+    key = json.dumps([
+        path,
+        version,
+        last_modified.isoformat() if last_modified else None,
+        sorted((name, sorted(values)) for name, values in params.lists()),
+    ])
+    return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+class SyncConditionalMixin:
+    """GET condicional (ETag / Last-Modified) para vistas de solo lectura
+
+    Los datos del dashboard cambian al terminar una sincronización o al
+    invalidarse su caché, así que los validadores se derivan de ambos y de
+    los parámetros de la petición. La vista llama a `not_modified()` tras comprobar la
+    autenticación y, si devuelve una respuesta 304, la entrega sin hacer
+    las consultas pesadas.
+    """
+
+    def not_modified(self, request):
+        version, last_modified = last_data_change()
+        etag = sync_etag(request.path, version, last_modified, request.query_params)
+        self._validators = (etag, last_modified)
+        return get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response.headers.setdefault('ETag', etag)
+            if last_modified:
+                response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+            # Obliga al navegador a revalidar en cada consulta
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,125 @@
+"""Coordinación de sincronizaciones concurrentes
+
+- Un solo trabajo activo por alcance: quien pide una sincronización
+  mientras otra suya equivalente está en cola o en ejecución se suma a
+  ella (restricción única parcial sobre `SyncJob.scope`). Los cursos se
+  descubren con las credenciales de quien inicia el trabajo, así que el
+  alcance incluye al usuario.
+- Un solo escritor por curso: cada hilo toma un advisory lock de
+  PostgreSQL sobre el curso antes de sincronizarlo, de modo que los
+  trabajos de distintos usuarios no escriben el mismo curso a la vez.
+- Los cursos sincronizados hace menos de CLASSROOM_SYNC_FRESHNESS_SECONDS
+  se omiten en las sincronizaciones incrementales.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Course, SyncJob
+
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+# Primera clave de los advisory locks de cursos, para no chocar con otros usos
+COURSE_LOCK_NAMESPACE = 7301
+
+
+def sync_scope(user, full_resync):
+    """Alcance de una sincronización: modo y usuario cuyas credenciales listan los cursos"""
+    return f"classroom:{'full' if full_resync else 'incremental'}:{user.pk}"
+
+
+def covering_scopes(user, full_resync):
+    """Alcances cuyos trabajos cubren una sincronización pedida
+
+    Una completa en curso del mismo usuario también cubre a una incremental.
+    """
+    scopes = [sync_scope(user, True)]
+    if not full_resync:
+        scopes.append(sync_scope(user, False))
+    return scopes
+
+
+def expire_stale_sync_jobs():
+    """Cerrar los trabajos activos que superan el tiempo límite de Celery
+
+    Si un worker muere el trabajo queda activo y bloquearía su alcance.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+    return SyncJob.objects.filter(status__in=ACTIVE_STATUSES).filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff)
+    ).update(
+        status='error',
+        message='Sincronización abandonada: superó el tiempo límite',
+        finished_at=timezone.now()
+    )
+
+
+def get_or_create_sync_job(user, full_resync):
+    """Devolver el trabajo activo de `user` que cubre la petición o crear uno nuevo
+
+    Devuelve `(job, created)`.
+    """
+    expire_stale_sync_jobs()
+
+    # Si el trabajo activo termina entre el IntegrityError y la consulta, reintentar
+    for _ in range(3):
+        job = SyncJob.objects.filter(
+            scope__in=covering_scopes(user, full_resync),
+            status__in=ACTIVE_STATUSES
+        ).order_by('created_at').first()
+        if job is not None:
+            return job, False
+
+        try:
+            with transaction.atomic():
+                job = SyncJob.objects.create(
+                    user=user,
+                    full_resync=full_resync,
+                    scope=sync_scope(user, full_resync)
+                )
+            return job, True
+        except IntegrityError:
+            continue
+
+    raise RuntimeError('No se pudo crear ni encontrar el trabajo de sincronización activo')
+
+
+@contextmanager
+def course_lock(course_id, wait=False):
+    """Advisory lock de sesión sobre un curso en la conexión del hilo actual
+
+    Entrega True si se obtuvo el lock. Sin `wait` no se espera: entrega
+    False si otro trabajo está sincronizando el curso.
+    """
+    with connection.cursor() as cursor:
+        if wait:
+            cursor.execute('SELECT pg_advisory_lock(%s, %s)', [COURSE_LOCK_NAMESPACE, course_id])
+            acquired = True
+        else:
+            cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [COURSE_LOCK_NAMESPACE, course_id])
+            acquired = cursor.fetchone()[0]
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [COURSE_LOCK_NAMESPACE, course_id])
+            except DatabaseError:
+                # Si la conexión se perdió, PostgreSQL ya liberó el lock con la sesión
+                pass
+
+
+def is_course_fresh(course_id):
+    """El curso se sincronizó dentro de la ventana de frescura"""
+    freshness = settings.CLASSROOM_SYNC_FRESHNESS_SECONDS
+    if not freshness:
+        return False
+    return Course.objects.filter(
+        pk=course_id,
+        last_synced_at__gte=timezone.now() - timedelta(seconds=freshness)
+    ).exists()
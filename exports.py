@@ -0,0 +1,33 @@
+import csv
+from django.http import StreamingHttpResponse
+
+
+# Filas que cada iterador de queryset trae de la base de datos por viaje
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Objeto tipo archivo que devuelve lo escrito en lugar de guardarlo"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    """Respuesta CSV que se genera fila a fila mientras se descarga
+
+    `rows` debe ser un iterador (p. ej. `queryset.iterator(chunk_size=...)`)
+    para que la memoria usada no dependa del tamaño de la exportación.
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        # BOM para que Excel reconozca la codificación UTF-8
+        yield '\ufeff'
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
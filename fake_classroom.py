@@ -0,0 +1,479 @@
+"""Servidor local que imita las APIs de Google Classroom y OAuth2
+
+Sirve los endpoints que usa la sincronización (cursos, alumnos,
+profesores, tareas y entregas, userinfo, refresco de token y batch
+multipart) a partir de un inquilino sintético. El inquilino se describe
+con unos pocos parámetros y una semilla; sus elementos se generan de
+forma determinista al pedirlos, así que un inquilino de millones de
+entregas no ocupa memoria y dos ejecuciones con la misma semilla ven los
+mismos datos.
+
+Para sincronizar contra él basta con apuntar GOOGLE_API_ROOT_URL y
+GOOGLE_TOKEN_URI al servidor.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+TENANT_DEFAULTS = {
+    'seed': 1,
+    'courses': 200,
+    'students': 20000,
+    'teachers': 400,
+    'students_per_course': 100,
+    'teachers_per_course': 2,
+    'coursework_per_course': 100,
+}
+
+COURSE_ID_BASE = 100000
+STUDENT_ID_BASE = 10 ** 9
+TEACHER_ID_BASE = 2 * 10 ** 9
+TENANT_START = datetime(2024, 9, 2, 8, 0, tzinfo=dt_timezone.utc)
+
+# Estado de la API que acompaña a cada código de error simulado
+ERROR_STATUSES = {
+    429: 'RESOURCE_EXHAUSTED',
+    500: 'INTERNAL',
+    502: 'UNAVAILABLE',
+    503: 'UNAVAILABLE',
+    504: 'DEADLINE_EXCEEDED',
+}
+
+
+def format_timestamp(value):
+    """Fecha en el formato RFC 3339 que devuelve la API"""
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + f'{value.microsecond // 1000:03d}Z'
+
+
+class FakeTenant:
+    """Inquilino sintético de Classroom generado a partir de una semilla"""
+
+    def __init__(self, **params):
+        unknown = set(params) - set(TENANT_DEFAULTS)
+        if unknown:
+            raise ValueError(f'Parámetros de inquilino desconocidos: {", ".join(sorted(unknown))}')
+        self.params = {**TENANT_DEFAULTS, **params}
+        for name, value in self.params.items():
+            setattr(self, name, value)
+
+        rng = random.Random(self.seed)
+        self.course_ids = [str(COURSE_ID_BASE + index) for index in range(self.courses)]
+        self.rosters = {
+            course_id: sorted(rng.sample(range(self.students), min(self.students_per_course, self.students)))
+            for course_id in self.course_ids
+        }
+        self.course_teachers = {
+            course_id: sorted(rng.sample(range(self.teachers), min(self.teachers_per_course, self.teachers)))
+            for course_id in self.course_ids
+        }
+        self._coursework = {}
+        self._coursework_by_id = {}
+        self._coursework_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as tenant_file:
+            return cls(**json.load(tenant_file))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as tenant_file:
+            json.dump(self.params, tenant_file, indent=2)
+
+    def totals(self):
+        """Tamaño del inquilino"""
+        enrollments = sum(len(roster) for roster in self.rosters.values())
+        return {
+            'courses': self.courses,
+            'students': self.students,
+            'teachers': self.teachers,
+            'enrollments': enrollments,
+            'coursework': self.courses * self.coursework_per_course,
+            'submissions': enrollments * self.coursework_per_course,
+        }
+
+    def _hash(self, *parts):
+        return zlib.crc32(':'.join(str(part) for part in (self.seed, *parts)).encode())
+
+    def course(self, course_id):
+        index = int(course_id) - COURSE_ID_BASE
+        created = TENANT_START + timedelta(hours=index)
+        return {
+            'id': course_id,
+            'name': f'Curso {index + 1}',
+            'section': f'Sección {index % 10 + 1}',
+            'description': f'Curso sintético {index + 1} para pruebas de carga',
+            'room': f'Aula {index % 50 + 1}',
+            'ownerId': self._teacher_id(self.course_teachers[course_id][0]),
+            'creationTime': format_timestamp(created),
+            'updateTime': format_timestamp(created + timedelta(days=1)),
+            'enrollmentCode': f'{self._hash("code", course_id):08x}'[:7],
+            'courseState': 'ACTIVE',
+            'alternateLink': f'https://classroom.google.com/c/{course_id}',
+        }
+
+    def _student_id(self, number):
+        return str(STUDENT_ID_BASE + number)
+
+    def _teacher_id(self, number):
+        return str(TEACHER_ID_BASE + number)
+
+    def _person(self, course_id, user_id, full_name, email):
+        return {
+            'courseId': course_id,
+            'userId': user_id,
+            'profile': {
+                'id': user_id,
+                'name': {'fullName': full_name},
+                'emailAddress': email,
+                'photoUrl': '',
+            },
+        }
+
+    def students_of(self, course_id):
+        return [
+            self._person(course_id, self._student_id(number), f'Alumno {number + 1}', f'alumno{number + 1}@ejemplo.edu')
+            for number in self.rosters[course_id]
+        ]
+
+    def teachers_of(self, course_id):
+        return [
+            self._person(course_id, self._teacher_id(number), f'Profesor {number + 1}', f'profesor{number + 1}@ejemplo.edu')
+            for number in self.course_teachers[course_id]
+        ]
+
+    def coursework_of(self, course_id):
+        """Tareas del curso ordenadas de más a menos reciente"""
+        with self._coursework_lock:
+            if course_id not in self._coursework:
+                self._coursework[course_id] = [
+                    self._build_coursework(course_id, index)
+                    for index in reversed(range(self.coursework_per_course))
+                ]
+                self._coursework_by_id[course_id] = {item['id']: item for item in self._coursework[course_id]}
+            return self._coursework[course_id]
+
+    def find_coursework(self, course_id, coursework_id):
+        self.coursework_of(course_id)
+        return self._coursework_by_id[course_id].get(coursework_id)
+
+    def _build_coursework(self, course_id, index):
+        created = TENANT_START + timedelta(hours=int(course_id) - COURSE_ID_BASE, days=index)
+        due = created + timedelta(days=7)
+        coursework = {
+            'courseId': course_id,
+            'id': f'{course_id}{index:05d}',
+            'title': f'Tarea {index + 1}',
+            'description': f'Tarea sintética {index + 1}',
+            'state': 'PUBLISHED',
+            'alternateLink': f'https://classroom.google.com/c/{course_id}/a/{index}',
+            'creationTime': format_timestamp(created),
+            'updateTime': format_timestamp(created + timedelta(hours=1)),
+            'maxPoints': 100,
+            'workType': 'ASSIGNMENT',
+        }
+        if self._hash('due', course_id, index) % 5:
+            coursework['dueDate'] = {'year': due.year, 'month': due.month, 'day': due.day}
+            coursework['dueTime'] = {'hours': 23, 'minutes': 59}
+        return coursework
+
+    def count_submissions(self, course_id, coursework_id):
+        roster_size = len(self.rosters[course_id])
+        if coursework_id == '-':
+            return roster_size * self.coursework_per_course
+        return roster_size
+
+    def submission_at(self, course_id, coursework_id, position):
+        """Entrega en la posición `position` del listado de una tarea (o del curso con '-')"""
+        roster = self.rosters[course_id]
+        if coursework_id == '-':
+            coursework_index, roster_index = divmod(position, len(roster))
+            coursework = self.coursework_of(course_id)[coursework_index]
+        else:
+            roster_index = position
+            coursework = self.find_coursework(course_id, coursework_id)
+        return self._build_submission(coursework, roster[roster_index])
+
+    def has_coursework(self, course_id, coursework_id):
+        return coursework_id == '-' or self.find_coursework(course_id, coursework_id) is not None
+
+    def _build_submission(self, coursework, student):
+        value = self._hash('submission', coursework['id'], student)
+        roll = value % 100
+        if roll < 45:
+            state = 'TURNED_IN'
+        elif roll < 65:
+            state = 'RETURNED'
+        elif roll < 90:
+            state = 'CREATED'
+        else:
+            state = 'NEW'
+
+        created = datetime.fromisoformat(coursework['creationTime'].replace('Z', '+00:00'))
+        submission = {
+            'courseId': coursework['courseId'],
+            'courseWorkId': coursework['id'],
+            'id': f'Cg{coursework["id"]}{student:06d}',
+            'userId': self._student_id(student),
+            'creationTime': format_timestamp(created),
+            'updateTime': format_timestamp(created + timedelta(minutes=(value >> 8) % (7 * 24 * 60))),
+            'state': state,
+            'late': state in ('TURNED_IN', 'RETURNED') and (value >> 16) % 100 < 10,
+            'alternateLink': f'{coursework["alternateLink"]}/submissions/{student}',
+            'courseWorkType': 'ASSIGNMENT',
+        }
+        if state == 'RETURNED':
+            submission['assignedGrade'] = (value >> 20) % 101
+        elif state == 'TURNED_IN' and (value >> 20) % 3 == 0:
+            submission['draftGrade'] = (value >> 20) % 101
+        return submission
+
+
+def paginate(items_field, total, item_at, page_size, page_token):
+    """Página de un listado con el token de continuación como desplazamiento"""
+    offset = int(page_token) if page_token else 0
+    end = min(offset + page_size, total)
+    body = {items_field: [item_at(position) for position in range(offset, end)]}
+    if end < total:
+        body['nextPageToken'] = str(end)
+    return body
+
+
+class FakeClassroomServer(ThreadingHTTPServer):
+    """Servidor HTTP del inquilino con latencia y errores configurables
+
+    `latency` y `latency_jitter` están en segundos. `error_rate` es la
+    probabilidad de que cada llamada (también cada parte de un batch)
+    responda con uno de `error_statuses`; los 429 llevan Retry-After.
+    """
+    daemon_threads = True
+
+    ROUTES = [
+        (re.compile(r'^/v1/courses$'), 'list_courses'),
+        (re.compile(r'^/v1/courses/(?P<course_id>[^/]+)/students$'), 'list_students'),
+        (re.compile(r'^/v1/courses/(?P<course_id>[^/]+)/teachers$'), 'list_teachers'),
+        (re.compile(r'^/v1/courses/(?P<course_id>[^/]+)/courseWork$'), 'list_coursework'),
+        (
+            re.compile(r'^/v1/courses/(?P<course_id>[^/]+)/courseWork/(?P<coursework_id>[^/]+)/studentSubmissions$'),
+            'list_submissions'
+        ),
+        (re.compile(r'^/oauth2/v2/userinfo$'), 'userinfo'),
+    ]
+
+    def __init__(self, address, tenant, latency=0.0, latency_jitter=0.0, error_rate=0.0,
+                 error_statuses=(429, 503), retry_after=1, max_page_size=1000, seed=None, verbose=False):
+        super().__init__(address, FakeClassroomHandler)
+        self.tenant = tenant
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._token_counter = 0
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def simulate_latency(self):
+        if self.latency or self.latency_jitter:
+            time.sleep(max(0.0, self.rng.gauss(self.latency, self.latency_jitter)))
+
+    def injected_error(self):
+        """Código de error a devolver, o None si la llamada debe responder bien"""
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self.rng.choice(self.error_statuses)
+        return None
+
+    def issue_token(self):
+        with self._stats_lock:
+            self._token_counter += 1
+            return f'fake-access-token-{self._token_counter}'
+
+    def handle_api(self, method, target, headers):
+        """Responder a una llamada de la API; devuelve (status, cabeceras, cuerpo JSON)"""
+        self.count('calls')
+        if not headers.get('authorization', '').lower().startswith('bearer '):
+            return self.error_response(401, 'UNAUTHENTICATED', 'Falta el token de acceso')
+
+        status = self.injected_error()
+        if status:
+            self.count(f'errors_{status}')
+            response = self.error_response(status, ERROR_STATUSES.get(status, 'UNKNOWN'), 'Error simulado')
+            if status == 429:
+                response[1]['Retry-After'] = str(self.retry_after)
+            return response
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method != 'GET':
+            return self.error_response(405, 'INVALID_ARGUMENT', 'Método no soportado')
+
+        for pattern, handler_name in self.ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                return getattr(self, handler_name)(query, **match.groupdict())
+        return self.error_response(404, 'NOT_FOUND', f'Ruta desconocida: {url.path}')
+
+    def error_response(self, status, api_status, message):
+        return status, {}, {'error': {'code': status, 'message': message, 'status': api_status}}
+
+    def page_size(self, query):
+        requested = int(query.get('pageSize') or 0)
+        return min(requested, self.max_page_size) if requested > 0 else self.max_page_size
+
+    def _course_or_404(self, course_id):
+        if course_id not in self.tenant.rosters:
+            return self.error_response(404, 'NOT_FOUND', f'Curso no encontrado: {course_id}')
+        return None
+
+    def _list(self, query, items_field, items):
+        self.count(items_field, 1)
+        body = paginate(items_field, len(items), items.__getitem__, self.page_size(query), query.get('pageToken'))
+        return 200, {}, body
+
+    def list_courses(self, query):
+        courses = [self.tenant.course(course_id) for course_id in self.tenant.course_ids]
+        return self._list(query, 'courses', courses)
+
+    def list_students(self, query, course_id):
+        return self._course_or_404(course_id) or self._list(query, 'students', self.tenant.students_of(course_id))
+
+    def list_teachers(self, query, course_id):
+        return self._course_or_404(course_id) or self._list(query, 'teachers', self.tenant.teachers_of(course_id))
+
+    def list_coursework(self, query, course_id):
+        not_found = self._course_or_404(course_id)
+        if not_found:
+            return not_found
+        coursework = self.tenant.coursework_of(course_id)
+        if query.get('orderBy', 'updateTime desc') == 'updateTime asc':
+            coursework = coursework[::-1]
+        return self._list(query, 'courseWork', coursework)
+
+    def list_submissions(self, query, course_id, coursework_id):
+        not_found = self._course_or_404(course_id)
+        if not_found:
+            return not_found
+        if not self.tenant.has_coursework(course_id, coursework_id):
+            return self.error_response(404, 'NOT_FOUND', f'Tarea no encontrada: {coursework_id}')
+
+        self.count('studentSubmissions')
+        body = paginate(
+            'studentSubmissions',
+            self.tenant.count_submissions(course_id, coursework_id),
+            lambda position: self.tenant.submission_at(course_id, coursework_id, position),
+            self.page_size(query),
+            query.get('pageToken')
+        )
+        return 200, {}, body
+
+    def userinfo(self, query):
+        return 200, {}, {
+            'id': '1',
+            'email': 'admin@ejemplo.edu',
+            'verified_email': True,
+            'name': 'Administrador Ejemplo',
+            'given_name': 'Administrador',
+            'family_name': 'Ejemplo',
+            'picture': '',
+        }
+
+
+class FakeClassroomHandler(BaseHTTPRequestHandler):
+    """Atiende las peticiones HTTP del servidor simulado"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _headers(self):
+        return {name.lower(): value for name, value in self.headers.items()}
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _send(self, status, headers, body, content_type='application/json; charset=UTF-8'):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.server.simulate_latency()
+        self._send(*self.server.handle_api('GET', self.path, self._headers()))
+
+    def do_POST(self):
+        body = self._read_body()
+        path = urlsplit(self.path).path
+        if path == '/token':
+            self._token(body)
+        elif path == '/batch':
+            self.server.simulate_latency()
+            self._batch(body)
+        else:
+            self.server.simulate_latency()
+            self._send(*self.server.handle_api('POST', self.path, self._headers()))
+
+    def _token(self, body):
+        """Refresco de token OAuth2: cualquier refresh_token es válido"""
+        self.server.count('tokens')
+        self._send(200, {}, {
+            'access_token': self.server.issue_token(),
+            'expires_in': 3600,
+            'token_type': 'Bearer',
+        })
+
+    def _batch(self, body):
+        """Petición batch multipart/mixed: cada parte es una llamada HTTP independiente"""
+        self.server.count('batches')
+        message = BytesParser().parsebytes(
+            f'Content-Type: {self.headers.get("Content-Type")}\r\n\r\n'.encode() + body
+        )
+        boundary = f'batch_{self.server.rng.getrandbits(64):016x}'
+        parts = []
+
+        for part in message.get_payload():
+            request_line, _, rest = part.get_payload().replace('\r\n', '\n').partition('\n')
+            method, target, _ = request_line.strip().split(' ', 2)
+            header_block = rest.split('\n\n', 1)[0]
+            headers = {}
+            for line in header_block.splitlines():
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            status, extra_headers, response_body = self.server.handle_api(method, target, headers)
+            status_line = f'HTTP/1.1 {status} {HTTPStatus(status).phrase}'
+            response_headers = ''.join(f'{name}: {value}\r\n' for name, value in extra_headers.items())
+            content_id = part.get('Content-ID', '<>')
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id[1:]}\r\n\r\n'
+                f'{status_line}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n'
+                f'{response_headers}\r\n'
+                f'{json.dumps(response_body)}\r\n'
+            )
+
+        payload = (''.join(parts) + f'--{boundary}--\r\n').encode()
+        self._send(200, {}, payload, content_type=f'multipart/mixed; boundary={boundary}')
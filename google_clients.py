@@ -0,0 +1,62 @@
+import json
+import threading
+from functools import lru_cache
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from django.conf import settings
+
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def get_discovery_document(service_name, version, root_url=None):
+    """Documento de descubrimiento de una API (JSON), cargado una vez por proceso
+
+    Se usa la copia estática incluida en google-api-python-client, así que
+    construir un cliente nunca depende de la red. Se cachea como texto y no
+    como dict: build_from_document modifica el documento que recibe, y los
+    hilos de la sincronización construyen clientes a la vez. `root_url`
+    sustituye el servidor de la API (por ejemplo un servidor de pruebas),
+    también para las peticiones batch.
+    """
+    document = discovery_cache.get_static_doc(service_name, version)
+    if document is None:
+        raise ValueError(f'No hay documento de descubrimiento incluido para {service_name} {version}')
+
+    if root_url:
+        document = json.loads(document)
+        document['rootUrl'] = root_url.rstrip('/') + '/'
+        document = json.dumps(document)
+    return document
+
+
+def get_thread_http():
+    """Conexión HTTP del hilo actual, reutilizada entre llamadas (keep-alive)
+
+    httplib2 no es thread-safe, así que cada hilo mantiene la suya.
+    """
+    if not hasattr(_local, 'http'):
+        _local.http = httplib2.Http(timeout=settings.GOOGLE_API_TIMEOUT)
+    return _local.http
+
+
+def build_service(service_name, version, credentials):
+    """Cliente de una API de Google para unas credenciales
+
+    Las credenciales se enlazan a la conexión del hilo con AuthorizedHttp,
+    sin volver a leer el documento de descubrimiento ni abrir conexiones.
+    El cliente devuelto solo debe usarse desde el hilo que lo creó.
+    """
+    document = get_discovery_document(service_name, version, settings.GOOGLE_API_ROOT_URL)
+    return build_from_document(document, http=AuthorizedHttp(credentials, http=get_thread_http()))
+
+
+def classroom_service(credentials):
+    return build_service('classroom', 'v1', credentials)
+
+
+def oauth2_service(credentials):
+    return build_service('oauth2', 'v2', credentials)
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from core.benchmarks import (
+    SCALES, BenchmarkRunner, check_budgets, compare_with_baseline, load_results, save_results
+)
+
+
+class Command(BaseCommand):
+    help = 'Medir la sincronización y los endpoints del dashboard a varias escalas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default='1x,10x',
+            help=f'Escalas a medir, separadas por comas ({", ".join(SCALES)})'
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Peticiones medidas por endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Peticiones previas sin medir')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latencia del servidor simulado')
+        parser.add_argument('--output', help='Guardar los resultados en este fichero JSON')
+        parser.add_argument('--baseline', help='Comparar con una línea base guardada')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25, help='Aumento de p95 admitido')
+        parser.add_argument('--memory-tolerance', type=float, default=0.25, help='Aumento de memoria admitido')
+
+    def handle(self, *args, **options):
+        scales = [scale.strip() for scale in options['scales'].split(',') if scale.strip()]
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise CommandError(f'Escalas desconocidas: {", ".join(sorted(unknown))}')
+        baseline = load_results(options['baseline']) if options['baseline'] else None
+
+        runner = BenchmarkRunner(
+            scales,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            latency=options['latency_ms'] / 1000,
+            log=self.stdout.write,
+        )
+
+        # Base de datos desechable: el banco de pruebas vacía y siembra las tablas
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = runner.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(f'Resultados guardados en {options["output"]}')
+
+        failures = check_budgets(results)
+        if baseline is not None:
+            failures += compare_with_baseline(
+                results, baseline, options['latency_tolerance'], options['memory_tolerance']
+            )
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} métrica(s) fuera de presupuesto')
+        self.stdout.write(self.style.SUCCESS('Todas las métricas dentro de presupuesto'))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.fake_classroom import TENANT_DEFAULTS, FakeClassroomServer, FakeTenant
+
+
+class Command(BaseCommand):
+    help = 'Servir localmente las APIs de Classroom y OAuth2 con un inquilino sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Inquilino generado con generate_tenant (por defecto el de tamaño estándar)')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latencia media por petición')
+        parser.add_argument('--latency-jitter-ms', type=float, default=0, help='Desviación típica de la latencia')
+        parser.add_argument('--error-rate', type=float, default=0, help='Probabilidad de error por llamada (0-1)')
+        parser.add_argument(
+            '--error-statuses',
+            default='429,503',
+            help='Códigos de error a simular, separados por comas'
+        )
+        parser.add_argument('--retry-after', type=int, default=1, help='Segundos de Retry-After en los 429')
+        parser.add_argument('--max-page-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, help='Semilla para latencias y errores')
+        parser.add_argument('--verbose', action='store_true', help='Registrar cada petición')
+
+    def handle(self, *args, **options):
+        tenant = FakeTenant.load(options['tenant']) if options['tenant'] else FakeTenant(**TENANT_DEFAULTS)
+        try:
+            error_statuses = [int(code) for code in options['error_statuses'].split(',') if code.strip()]
+        except ValueError:
+            raise CommandError('--error-statuses debe ser una lista de códigos HTTP')
+
+        server = FakeClassroomServer(
+            (options['host'], options['port']),
+            tenant,
+            latency=options['latency_ms'] / 1000,
+            latency_jitter=options['latency_jitter_ms'] / 1000,
+            error_rate=options['error_rate'],
+            error_statuses=error_statuses,
+            retry_after=options['retry_after'],
+            max_page_size=options['max_page_size'],
+            seed=options['seed'],
+            verbose=options['verbose'],
+        )
+
+        url = f'http://{options["host"]}:{server.server_address[1]}'
+        for name, value in tenant.totals().items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS(f'Servidor simulado en {url}'))
+        self.stdout.write(f'Usar con GOOGLE_API_ROOT_URL={url}/ GOOGLE_TOKEN_URI={url}/token')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Peticiones atendidas: {dict(server.stats)}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from core.fake_classroom import TENANT_DEFAULTS, FakeTenant
+
+
+class Command(BaseCommand):
+    help = 'Generar la descripción de un inquilino sintético de Classroom para el servidor simulado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Fichero JSON donde guardar el inquilino')
+        for name, default in TENANT_DEFAULTS.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}',
+                type=int,
+                default=default,
+                dest=name,
+                help=f'Por defecto {default}'
+            )
+
+    def handle(self, *args, **options):
+        tenant = FakeTenant(**{name: options[name] for name in TENANT_DEFAULTS})
+        tenant.save(options['output'])
+
+        for name, value in tenant.totals().items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS(f'Inquilino guardado en {options["output"]}'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from core.caching import invalidate_dashboard_cache
+from core.models import Course
+from core.progress import refresh_course_progress
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir desde cero el resumen de progreso por estudiante y curso'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            action='append',
+            dest='courses',
+            help='ID de Google del curso a reconstruir (se puede repetir)'
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['courses']:
+            courses = courses.filter(google_course_id__in=options['courses'])
+
+        total = 0
+        cohorts = set()
+        for course in courses.only('pk', 'name', 'cohort'):
+            count = refresh_course_progress(course.pk)
+            total += count
+            cohorts.add(course.cohort)
+            self.stdout.write(f'{course.name}: {count} estudiantes')
+
+        # Las estadísticas cacheadas se calcularon con los resúmenes anteriores
+        invalidate_dashboard_cache(cohorts)
+
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos: {total}'))
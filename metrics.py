@@ -0,0 +1,191 @@
+"""Instrumentación por petición y endpoint de métricas de Prometheus
+
+`MetricsMiddleware` mide para cada vista el tiempo total, las consultas
+SQL y su duración, las llamadas a las APIs de Google y el tiempo de
+serialización, y los publica como histogramas. Con gunicorn, definir
+PROMETHEUS_MULTIPROC_DIR (un directorio vacío al arrancar) para que
+`/metrics` agregue los valores de todos los procesos. Las llamadas a
+Google se hacen en el worker de Celery: si comparte el directorio con el
+backend, cada servicio define PROMETHEUS_PROCESS_PREFIX para que sus
+ficheros no choquen con los de otro contenedor con los mismos PID.
+
+Si el cliente envía la cabecera X-Debug-Timing (en DEBUG o con un usuario
+staff), la respuesta incluye el desglose en la cabecera Server-Timing.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess, values
+from rest_framework import serializers
+
+
+DEBUG_TIMING_HEADER = 'X-Debug-Timing'
+
+# Debe aplicarse antes de crear los histogramas
+PROCESS_PREFIX = os.environ.get('PROMETHEUS_PROCESS_PREFIX')
+if PROCESS_PREFIX and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    values.ValueClass = values.MultiProcessValue(lambda: f'{PROCESS_PREFIX}-{os.getpid()}')
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+REQUEST_DURATION = Histogram(
+    'ecampus_http_request_duration_seconds',
+    'Duración de las peticiones HTTP por vista',
+    ['view', 'method', 'status']
+)
+DB_QUERIES = Histogram(
+    'ecampus_http_db_queries',
+    'Consultas SQL por petición',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_DURATION = Histogram(
+    'ecampus_http_db_duration_seconds',
+    'Tiempo en base de datos por petición',
+    ['view']
+)
+SERIALIZER_DURATION = Histogram(
+    'ecampus_http_serializer_duration_seconds',
+    'Tiempo de serialización por petición',
+    ['view']
+)
+GOOGLE_API_CALLS = Histogram(
+    'ecampus_http_google_api_calls',
+    'Llamadas a las APIs de Google por petición',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS
+)
+GOOGLE_API_DURATION = Histogram(
+    'ecampus_google_api_request_duration_seconds',
+    'Latencia de las llamadas a las APIs de Google por endpoint',
+    ['endpoint', 'outcome']
+)
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Tiempos acumulados durante una petición"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.google_calls = 0
+        self.google_time = 0.0
+        self.serializer_time = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def server_timing(self):
+        """Valor de la cabecera Server-Timing (duraciones en milisegundos)"""
+        return ', '.join([
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} consultas"',
+            f'google;dur={self.google_time * 1000:.1f};desc="{self.google_calls} llamadas"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+        ])
+
+
+def google_endpoint(request):
+    """Nombre del endpoint de una petición de googleapiclient (o 'batch')"""
+    return getattr(request, 'methodId', None) or 'batch'
+
+
+@contextmanager
+def observe_google_call(endpoint):
+    """Medir una llamada a una API de Google"""
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        GOOGLE_API_DURATION.labels(endpoint, outcome).observe(elapsed)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.google_calls += 1
+            timings.google_time += elapsed
+
+
+class TimedSerializerMixin:
+    """Acumular en la petición el tiempo de serialización
+
+    Solo se mide el serializer de nivel superior (o cada elemento de un
+    listado) para no contar dos veces los anidados.
+    """
+
+    def to_representation(self, instance):
+        timings = _current_timings.get()
+        parent = self.parent
+        is_root = parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+        if timings is None or not is_root:
+            return super().to_representation(instance)
+
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializer_time += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Registrar las métricas de cada petición"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        timings.total = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.route if match else 'sin_ruta'
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(timings.total)
+        DB_QUERIES.labels(view).observe(timings.db_queries)
+        DB_DURATION.labels(view).observe(timings.db_time)
+        SERIALIZER_DURATION.labels(view).observe(timings.serializer_time)
+        GOOGLE_API_CALLS.labels(view).observe(timings.google_calls)
+
+        if request.headers.get(DEBUG_TIMING_HEADER) and self._debug_allowed(request):
+            response['Server-Timing'] = timings.server_timing()
+        return response
+
+    def _debug_allowed(self, request):
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user and user.is_staff)
+
+
+def metrics_view(request):
+    """Métricas en formato de texto de Prometheus"""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -42,6 +43,14 @@ class Course(models.Model):
     # Campos adicionales para e-campus
     cohort = models.CharField(max_length=100, blank=True, help_text="Cohorte o grupo del curso")
     is_active = models.BooleanField(default=True)
+    coursework_watermark = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Mayor updateTime de tareas sincronizado; base de la sincronización incremental"
+    )
+    last_synced_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="Inicio de la última sincronización completa del curso sin errores"
+    )
     
     def __str__(self):
         return f"{self.name} ({self.section})"
@@ -116,16 +125,57 @@ class StudentSubmission(models.Model):
         return f"{self.user.google_name} - {self.coursework.title} ({self.state})"
 
 
+class StudentCourseProgress(models.Model):
+    """Resumen precalculado del progreso de un estudiante en un curso"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    total_assignments = models.IntegerField(default=0)
+    submissions_count = models.IntegerField(default=0)
+    turned_in_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    missing_count = models.IntegerField(default=0)
+    graded_count = models.IntegerField(default=0)
+    grade_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['course', 'user']
+    
+    @property
+    def completion_percentage(self):
+        if not self.total_assignments:
+            return 0
+        return round(self.turned_in_count / self.total_assignments * 100, 2)
+    
+    @property
+    def average_grade(self):
+        if not self.graded_count:
+            return None
+        return self.grade_sum / self.graded_count
+    
+    def __str__(self):
+        return f"{self.user.google_name} en {self.course.name}: {self.turned_in_count}/{self.total_assignments}"
+
+
 class SyncLog(models.Model):
-    """Log de sincronización con Google Classroom"""
+    """Log de sincronización con Google Classroom
+
+    Cada SyncJob deja un registro por fase y curso con su duración, el uso
+    de la API y las filas escritas.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    job = models.ForeignKey('SyncJob', on_delete=models.CASCADE, null=True, blank=True, related_name='phases')
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True)
     sync_type = models.CharField(
         max_length=50,
         choices=[
+            ('full', 'Completa'),
             ('courses', 'Cursos'),
             ('coursework', 'Tareas'),
             ('submissions', 'Entregas'),
             ('enrollments', 'Inscripciones'),
+            ('progress', 'Resumen de progreso'),
         ]
     )
     status = models.CharField(
@@ -138,7 +188,76 @@ class SyncLog(models.Model):
     )
     message = models.TextField(blank=True)
     items_processed = models.IntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    items_inserted = models.IntegerField(default=0)
+    items_updated = models.IntegerField(default=0)
+    items_unchanged = models.IntegerField(default=0)
+    api_calls = models.IntegerField(default=0)
+    pages = models.IntegerField(default=0)
+    throttled_seconds = models.FloatField(default=0, help_text="Tiempo de espera por cuota y backoff")
+    duration_seconds = models.FloatField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     def __str__(self):
         return f"{self.sync_type} - {self.status} ({self.created_at})"
+
+
+class SyncJob(models.Model):
+    """Trabajo de sincronización ejecutado en segundo plano"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task_id = models.CharField(max_length=255, blank=True)
+    full_resync = models.BooleanField(default=False)
+    scope = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text="Alcance de la sincronización; solo puede haber un trabajo activo por alcance"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'En cola'),
+            ('running', 'En ejecución'),
+            ('success', 'Exitoso'),
+            ('partial', 'Parcial'),
+            ('error', 'Error'),
+        ],
+        default='pending'
+    )
+    courses_total = models.IntegerField(default=0)
+    courses_processed = models.IntegerField(default=0)
+    courses_synced = models.IntegerField(default=0)
+    courses_skipped = models.IntegerField(default=0, help_text="Cursos recientes o que sincronizaba otro trabajo")
+    coursework_synced = models.IntegerField(default=0)
+    submissions_synced = models.IntegerField(default=0)
+    submissions_inserted = models.IntegerField(default=0)
+    submissions_updated = models.IntegerField(default=0)
+    api_calls = models.IntegerField(default=0)
+    api_retries = models.IntegerField(default=0)
+    throttled_seconds = models.FloatField(default=0, help_text="Tiempo de espera por cuota y backoff")
+    errors = models.JSONField(default=dict, blank=True, help_text="Errores agrupados por curso de Google")
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_sync_job_scope'
+            ),
+        ]
+    
+    @property
+    def progress(self):
+        """Porcentaje de cursos procesados"""
+        if not self.courses_total:
+            return 100.0 if self.status in ('success', 'partial') else 0.0
+        return round(self.courses_processed / self.courses_total * 100, 2)
+    
+    def __str__(self):
+        return f"Sincronización {self.id} - {self.status}"
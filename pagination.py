@@ -0,0 +1,33 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderedCursorPagination(CursorPagination):
+    """Paginación por cursor con el orden elegido por la vista
+
+    La vista expone `get_ordering()` con campos de orden ya validados; el
+    último campo debe ser único para que el orden sea estable.
+    """
+    page_size_query_param = 'page_size'
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, 'get_ordering'):
+            return tuple(view.get_ordering())
+        return super().get_ordering(request, queryset, view)
+
+
+class StudentProgressPagination(OrderedCursorPagination):
+    page_size = 50
+    max_page_size = 500
+    ordering = ('user__google_name', 'id')
+
+
+class CoursePagination(OrderedCursorPagination):
+    page_size = 100
+    max_page_size = 1000
+    ordering = ('name', 'id')
+
+
+class TeacherPagination(OrderedCursorPagination):
+    page_size = 50
+    max_page_size = 500
+    ordering = ('google_name', 'id')
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum, Value, FloatField
+from django.db.models.functions import Coalesce
+from .models import CourseEnrollment, CourseWork, StudentSubmission, StudentCourseProgress
+
+
+PROGRESS_COUNT_FIELDS = [
+    'submissions_count', 'turned_in_count', 'late_count',
+    'pending_count', 'graded_count', 'grade_sum',
+]
+
+PROGRESS_UPDATE_FIELDS = ['total_assignments', 'missing_count', *PROGRESS_COUNT_FIELDS, 'updated_at']
+
+EMPTY_PROGRESS = {field: 0 for field in PROGRESS_COUNT_FIELDS}
+
+
+def refresh_course_progress(course_id, user_ids=None):
+    """Recalcular el resumen de progreso de los estudiantes de un curso
+
+    Sin `user_ids` se recalcula el curso completo (y se eliminan los
+    resúmenes de quienes ya no están inscritos); con `user_ids` solo los
+    de esos estudiantes. Devuelve el número de resúmenes escritos.
+    """
+    enrollments = CourseEnrollment.objects.filter(course_id=course_id, role='STUDENT')
+    if user_ids is not None:
+        if not user_ids:
+            return 0
+        enrollments = enrollments.filter(user_id__in=user_ids)
+
+    total_assignments = CourseWork.objects.filter(course_id=course_id).count()
+
+    # Contadores de todos los estudiantes del curso en una consulta agrupada
+    submissions = StudentSubmission.objects.filter(
+        coursework__course_id=course_id,
+        user_id__in=enrollments.values('user_id')
+    ).order_by().values('user_id').annotate(
+        submissions_count=Count('pk'),
+        turned_in_count=Count('pk', filter=Q(state='TURNED_IN')),
+        late_count=Count('pk', filter=Q(state='TURNED_IN', late=True)),
+        pending_count=Count('pk', filter=Q(state__in=['NEW', 'CREATED'])),
+        graded_count=Count('assigned_grade'),
+        grade_sum=Coalesce(Sum('assigned_grade'), Value(0.0), output_field=FloatField()),
+    )
+    counts_by_user = {row.pop('user_id'): row for row in submissions}
+
+    rows = []
+    for user_id in enrollments.values_list('user_id', flat=True):
+        counts = counts_by_user.get(user_id, EMPTY_PROGRESS)
+        rows.append(StudentCourseProgress(
+            course_id=course_id,
+            user_id=user_id,
+            total_assignments=total_assignments,
+            missing_count=max(total_assignments - counts['turned_in_count'], 0),
+            **counts
+        ))
+
+    with transaction.atomic():
+        if user_ids is None:
+            StudentCourseProgress.objects.filter(course_id=course_id).exclude(
+                user_id__in=[row.user_id for row in rows]
+            ).delete()
+        StudentCourseProgress.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['course', 'user'],
+            update_fields=PROGRESS_UPDATE_FIELDS
+        )
+
+    return len(rows)
+
+
+def students_without_progress(course_id):
+    """IDs de los estudiantes inscritos en un curso que aún no tienen resumen"""
+    return set(
+        CourseEnrollment.objects.filter(course_id=course_id, role='STUDENT')
+        .exclude(user__studentcourseprogress__course_id=course_id)
+        .values_list('user_id', flat=True)
+    )
+
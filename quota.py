@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from googleapiclient.errors import HttpError
+from django.conf import settings
+from .metrics import google_endpoint, observe_google_call
+
+
+# Errores de Classroom que se reintentan
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Motivos con los que la API señala un límite de cuota en respuestas 403
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded', 'RESOURCE_EXHAUSTED'}
+# Errores de red transitorios (socket.timeout es TimeoutError)
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+METRIC_FIELDS = ('api_calls', 'api_retries', 'throttled_seconds')
+
+
+class TokenBucket:
+    """Cubo de tokens compartido por los hilos de un proceso
+
+    `reserve()` descuenta los tokens aunque no haya suficientes y devuelve
+    cuánto debe esperar quien los pidió, de modo que las llamadas salen
+    repartidas a la tasa configurada sin esperas activas.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens=1):
+        """Reservar `tokens` y devolver los segundos de espera necesarios"""
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+            return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """Vaciar el cubo para que nadie llame durante `seconds`"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(key, rate):
+    """Cubo de tokens del proceso para una clave (proyecto o usuario)"""
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate)
+        return _buckets[key]
+
+
+def get_retry_after(error):
+    """Segundos indicados en la cabecera Retry-After de un HttpError, si la hay"""
+    resp = getattr(error, 'resp', None)
+    value = resp.get('retry-after') if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(dt_timezone.utc)).total_seconds())
+
+
+def is_rate_limited(error):
+    """El error indica que se superó una cuota"""
+    if not isinstance(error, HttpError):
+        return False
+    if error.status_code == 429:
+        return True
+    if error.status_code == 403 and isinstance(error.error_details, list):
+        reasons = {detail.get('reason') for detail in error.error_details if isinstance(detail, dict)}
+        return bool(reasons & RATE_LIMIT_REASONS)
+    return False
+
+
+def is_retryable(error):
+    """El error es transitorio y la llamada puede repetirse"""
+    if isinstance(error, HttpError):
+        return error.status_code in RETRYABLE_STATUSES or is_rate_limited(error)
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class QuotaScheduler:
+    """Punto único por el que pasan las llamadas a la API de Classroom
+
+    Antes de cada llamada se reservan tokens en el cubo del proyecto y en
+    el del usuario; los errores transitorios se reintentan con backoff
+    exponencial con jitter, respetando Retry-After. Un límite de cuota
+    pausa además los cubos, así que los demás hilos también frenan en vez
+    de seguir recibiendo 429.
+
+    Los cubos viven en memoria: el límite de proyecto se aplica por proceso.
+    """
+
+    def __init__(self, user_key=None):
+        self.buckets = [get_bucket('project', settings.CLASSROOM_PROJECT_QPS)]
+        if user_key is not None:
+            self.buckets.append(get_bucket(f'user:{user_key}', settings.CLASSROOM_USER_QPS))
+        self.max_retries = settings.CLASSROOM_MAX_RETRIES
+        self._metrics = dict.fromkeys(METRIC_FIELDS, 0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def metrics(self):
+        """Llamadas, reintentos y segundos de espera acumulados"""
+        with self._lock:
+            return {**self._metrics, 'throttled_seconds': round(self._metrics['throttled_seconds'], 3)}
+
+    @contextmanager
+    def track(self, counters):
+        """Sumar también en `counters` lo que este hilo haga dentro del bloque
+
+        Además de las métricas globales se cuentan las páginas recibidas.
+        """
+        previous = getattr(self._local, 'counters', None)
+        self._local.counters = counters
+        try:
+            yield counters
+        finally:
+            self._local.counters = previous
+
+    def _record(self, **increments):
+        counters = getattr(self._local, 'counters', None)
+        with self._lock:
+            for field, value in increments.items():
+                if field in self._metrics:
+                    self._metrics[field] += value
+                if counters is not None:
+                    counters[field] = counters.get(field, 0) + value
+
+    def record_page(self):
+        """Anotar una página de resultados recibida"""
+        self._record(pages=1)
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            self._record(throttled_seconds=seconds)
+            time.sleep(seconds)
+
+    def acquire(self, calls=1):
+        """Esperar hasta que las cuotas permitan `calls` llamadas"""
+        self._sleep(max(bucket.reserve(calls) for bucket in self.buckets))
+        self._record(api_calls=calls)
+
+    def retry_delay(self, error, attempt):
+        """Espera antes del reintento `attempt` (desde 0), o None si no se reintenta
+
+        Ante un límite de cuota la espera se aplica pausando los cubos, de
+        modo que la cumple el próximo `acquire()` y la comparten todos los
+        hilos; en ese caso el valor devuelto es 0.
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+
+        self._record(api_retries=1)
+        backoff = min(settings.CLASSROOM_BACKOFF_MAX, settings.CLASSROOM_BACKOFF_BASE * 2 ** attempt)
+        delay = max(random.uniform(0, backoff), get_retry_after(error) or 0)
+        if is_rate_limited(error):
+            for bucket in self.buckets:
+                bucket.pause(delay)
+            return 0.0
+        return delay
+
+    def backoff(self, delay):
+        """Esperar antes de reintentar"""
+        self._sleep(delay)
+
+    def execute(self, request, calls=1):
+        """Ejecutar una petición (o un batch de `calls` peticiones) con cuota y reintentos"""
+        attempt = 0
+        while True:
+            self.acquire(calls)
+            try:
+                with observe_google_call(google_endpoint(request)):
+                    return request.execute()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self.backoff(delay)
+                attempt += 1
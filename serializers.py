@@ -1,14 +1,112 @@
 from rest_framework import serializers
-from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog
+from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog, SyncJob
+from .metrics import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+def parse_field_list(value):
+    """Convertir un parámetro 'a,b,c' en lista, ignorando vacíos"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+class SparseFieldsMixin:
+    """Campos a demanda para ModelSerializer: `fields=` y `expand=`
+
+    Por defecto las relaciones se representan con su ID. `expand` recibe
+    los nombres de `Meta.expandable_fields` que deben anidarse completos
+    (se admiten rutas como 'coursework.course') y `fields` limita los
+    campos devueltos. Las vistas de listado usan `Meta.list_fields` cuando
+    no se pide `fields`.
+    """
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Agrupar 'relacion.subrelacion' por la relación de primer nivel
+        nested_expand = {}
+        for path in expand or []:
+            name, _, rest = path.partition('.')
+            nested_expand.setdefault(name, [])
+            if rest:
+                nested_expand[name].append(rest)
+        
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name, nested in nested_expand.items():
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name](read_only=True, expand=nested)
+        
+        if fields:
+            for name in set(self.fields) - set(fields) - {'id'}:
+                self.fields.pop(name)
+    
+    @classmethod
+    def from_request(cls, request, *args, list_view=False, **kwargs):
+        """Construir el serializer leyendo `fields` y `expand` de la petición"""
+        fields = parse_field_list(request.query_params.get('fields'))
+        if not fields and list_view:
+            fields = getattr(cls.Meta, 'list_fields', None)
+        expand = parse_field_list(request.query_params.get('expand'))
+        return cls(*args, fields=fields, expand=expand, **kwargs)
+    
+    def optimize_queryset(self, queryset, extra_fields=()):
+        """Aplicar only() y select_related() según los campos que se van a serializar"""
+        model = queryset.model
+        only_fields, related = self._model_fields(model)
+        if only_fields is None:
+            return queryset
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only_fields, *extra_fields)
+    
+    def _model_fields(self, model, prefix=''):
+        """Campos de modelo necesarios para los campos del serializer
+
+        Devuelve (None, None) si algún campo no corresponde a una columna
+        del modelo, en cuyo caso no es seguro diferir columnas.
+        """
+        concrete = {field.name: field for field in model._meta.concrete_fields}
+        only_fields = [f'{prefix}{model._meta.pk.name}']
+        related = []
+        
+        for field in self.fields.values():
+            model_field = concrete.get(field.source)
+            if model_field is None:
+                return None, None
+            only_fields.append(f'{prefix}{field.source}')
+            
+            if isinstance(field, SparseFieldsMixin):
+                nested_only, nested_related = field._model_fields(
+                    model_field.related_model, prefix=f'{prefix}{field.source}__'
+                )
+                if nested_only is None:
+                    return None, None
+                related.append(f'{prefix}{field.source}')
+                only_fields.extend(nested_only)
+                related.extend(nested_related)
+        
+        return only_fields, related
+
+
+class UserSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'google_name', 'google_email', 'google_picture', 'role']
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class TeacherSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Profesor con su carga de clases agregada"""
+    courses_count = serializers.IntegerField(read_only=True)
+    students_count = serializers.IntegerField(read_only=True)
+    pending_grading_count = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'google_name', 'google_email', 'google_picture',
+            'courses_count', 'students_count', 'pending_grading_count'
+        ]
+
+
+class CourseSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = [
@@ -17,20 +115,22 @@ class CourseSerializer(serializers.ModelSerializer):
             'enrollment_code', 'course_state', 'alternate_link', 
             'cohort', 'is_active'
         ]
+        # Los listados omiten la descripción salvo que se pida con ?fields=
+        list_fields = [
+            'id', 'google_course_id', 'name', 'section', 'room', 'owner_id',
+            'creation_time', 'update_time', 'enrollment_code', 'course_state',
+            'alternate_link', 'cohort', 'is_active'
+        ]
 
 
-class CourseEnrollmentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
-    course = CourseSerializer(read_only=True)
-    
+class CourseEnrollmentSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseEnrollment
         fields = ['id', 'course', 'user', 'role', 'created_at']
+        expandable_fields = {'course': CourseSerializer, 'user': UserSerializer}
 
 
-class CourseWorkSerializer(serializers.ModelSerializer):
-    course = CourseSerializer(read_only=True)
-    
+class CourseWorkSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseWork
         fields = [
@@ -38,12 +138,14 @@ class CourseWorkSerializer(serializers.ModelSerializer):
             'state', 'alternate_link', 'creation_time', 'update_time',
             'due_date', 'due_time', 'max_points', 'work_type'
         ]
+        list_fields = [
+            'id', 'google_coursework_id', 'course', 'title', 'state',
+            'due_date', 'due_time', 'max_points', 'work_type'
+        ]
+        expandable_fields = {'course': CourseSerializer}
 
 
-class StudentSubmissionSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
-    coursework = CourseWorkSerializer(read_only=True)
-    
+class StudentSubmissionSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StudentSubmission
         fields = [
@@ -51,9 +153,10 @@ class StudentSubmissionSerializer(serializers.ModelSerializer):
             'creation_time', 'update_time', 'state', 'late',
             'draft_grade', 'assigned_grade', 'alternate_link'
         ]
+        expandable_fields = {'coursework': CourseWorkSerializer, 'user': UserSerializer}
 
 
-class SyncLogSerializer(serializers.ModelSerializer):
+class SyncLogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -64,7 +167,47 @@ class SyncLogSerializer(serializers.ModelSerializer):
         ]
 
 
-class DashboardStatsSerializer(serializers.Serializer):
+class SyncPhaseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Registro de una fase de sincronización de un curso"""
+    course_name = serializers.CharField(source='course.name', read_only=True, default=None)
+    
+    class Meta:
+        model = SyncLog
+        fields = [
+            'id', 'job', 'course', 'course_name', 'sync_type', 'status', 'message',
+            'items_processed', 'items_inserted', 'items_updated', 'items_unchanged',
+            'api_calls', 'pages', 'throttled_seconds', 'duration_seconds', 'started_at', 'created_at'
+        ]
+
+
+class SyncPhaseStatsSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Duración agregada de las fases de sincronización por curso y/o fase"""
+    course_id = serializers.IntegerField(required=False, allow_null=True)
+    course_name = serializers.CharField(source='course__name', required=False, allow_null=True)
+    sync_type = serializers.CharField(required=False)
+    runs = serializers.IntegerField()
+    avg_duration_seconds = serializers.FloatField()
+    max_duration_seconds = serializers.FloatField()
+    total_duration_seconds = serializers.FloatField()
+    avg_api_calls = serializers.FloatField()
+    total_throttled_seconds = serializers.FloatField()
+    error_count = serializers.IntegerField()
+
+
+class SyncJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = SyncJob
+        fields = [
+            'id', 'status', 'full_resync', 'scope', 'progress', 'courses_total', 'courses_processed',
+            'courses_synced', 'courses_skipped', 'coursework_synced', 'submissions_synced',
+            'submissions_inserted', 'submissions_updated', 'api_calls', 'api_retries', 'throttled_seconds',
+            'errors', 'message', 'created_at', 'started_at', 'finished_at'
+        ]
+
+
+class DashboardStatsSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer para estadísticas del dashboard"""
     total_courses = serializers.IntegerField()
     total_students = serializers.IntegerField()
@@ -76,7 +219,7 @@ class DashboardStatsSerializer(serializers.Serializer):
     completion_rate = serializers.FloatField()
 
 
-class CourseProgressSerializer(serializers.Serializer):
+class CourseProgressSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer para progreso por curso"""
     course_id = serializers.IntegerField()
     course_name = serializers.CharField()
@@ -86,11 +229,12 @@ class CourseProgressSerializer(serializers.Serializer):
     students_count = serializers.IntegerField()
 
 
-class StudentProgressSerializer(serializers.Serializer):
+class StudentProgressSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer para progreso de estudiantes"""
     student_id = serializers.IntegerField()
     student_name = serializers.CharField()
     student_email = serializers.CharField()
+    course_id = serializers.IntegerField()
     course_name = serializers.CharField()
     total_assignments = serializers.IntegerField()
     completed_assignments = serializers.IntegerField()
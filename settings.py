@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -165,3 +167,61 @@ AUTH_USER_MODEL = 'core.User'
 GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
 GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
 GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI')
+# Servidor alternativo para las APIs de Google (p. ej. un servidor de pruebas)
+GOOGLE_API_ROOT_URL = os.getenv('GOOGLE_API_ROOT_URL') or None
+GOOGLE_TOKEN_URI = os.getenv('GOOGLE_TOKEN_URI', 'https://oauth2.googleapis.com/token')
+GOOGLE_API_TIMEOUT = int(os.getenv('GOOGLE_API_TIMEOUT', 60))
+
+# Cache settings
+if os.getenv('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Tiempo máximo en caché de las respuestas del dashboard (segundos)
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60 * 10))
+
+# Celery settings
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_TIME_LIMIT = int(os.getenv('CELERY_TASK_TIME_LIMIT', 60 * 60))
+CELERY_TIMEZONE = TIME_ZONE
+# La sincronización incremental trae todas las entregas del curso, pero solo las tareas con
+# updateTime posterior a la marca de agua; una resincronización completa diaria recorre todas
+CELERY_BEAT_SCHEDULE = {
+    'classroom-full-resync': {
+        'task': 'core.tasks.schedule_full_resync',
+        'schedule': crontab(hour=int(os.getenv('CLASSROOM_FULL_RESYNC_HOUR', 3)), minute=0),
+    },
+}
+
+# Métricas de Prometheus: si se define, /metrics exige 'Authorization: Bearer <token>'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Sincronización con Google Classroom
+CLASSROOM_SYNC_CONCURRENCY = int(os.getenv('CLASSROOM_SYNC_CONCURRENCY', 8))
+CLASSROOM_BATCH_SIZE = int(os.getenv('CLASSROOM_BATCH_SIZE', 50))
+# Tamaños de página por endpoint, p. ej. {'studentSubmissions': 500}
+CLASSROOM_PAGE_SIZES = {}
+CLASSROOM_SYNC_UPSERT_CHUNK_SIZE = int(os.getenv('CLASSROOM_SYNC_UPSERT_CHUNK_SIZE', 2000))
+# A partir de este número de tareas las entregas se piden en un solo listado por curso
+CLASSROOM_SYNC_COURSE_WIDE_THRESHOLD = int(os.getenv('CLASSROOM_SYNC_COURSE_WIDE_THRESHOLD', 10))
+# Las sincronizaciones incrementales omiten los cursos sincronizados hace menos de estos segundos (0 desactiva)
+CLASSROOM_SYNC_FRESHNESS_SECONDS = int(os.getenv('CLASSROOM_SYNC_FRESHNESS_SECONDS', 300))
+# Cuotas de la API (peticiones por segundo, por proceso) y reintentos
+CLASSROOM_PROJECT_QPS = float(os.getenv('CLASSROOM_PROJECT_QPS', 50))
+CLASSROOM_USER_QPS = float(os.getenv('CLASSROOM_USER_QPS', 20))
+CLASSROOM_MAX_RETRIES = int(os.getenv('CLASSROOM_MAX_RETRIES', 6))
+CLASSROOM_BACKOFF_BASE = float(os.getenv('CLASSROOM_BACKOFF_BASE', 1))
+CLASSROOM_BACKOFF_MAX = float(os.getenv('CLASSROOM_BACKOFF_MAX', 64))
@@ -0,0 +1,564 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, time, timezone as dt_timezone
+from time import perf_counter
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog
+from .classroom import BatchLister, iter_items, iter_pages
+from .coordination import course_lock, is_course_fresh
+from .google_clients import classroom_service
+from .quota import QuotaScheduler
+from .progress import refresh_course_progress, students_without_progress
+
+
+def get_user_credentials(user):
+    """Construir credenciales de Google a partir de los tokens guardados del usuario"""
+    expiry = None
+    if user.token_expires_at:
+        # google-auth compara la expiración como UTC sin zona horaria
+        expiry = timezone.make_naive(user.token_expires_at, dt_timezone.utc)
+
+    credentials = Credentials(
+        token=user.access_token,
+        refresh_token=user.refresh_token,
+        token_uri=settings.GOOGLE_TOKEN_URI,
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        expiry=expiry
+    )
+
+    # Refrescar token si es necesario
+    if credentials.expired or not credentials.token:
+        credentials.refresh(Request())
+        user.access_token = credentials.token
+        if credentials.expiry:
+            user.token_expires_at = timezone.make_aware(credentials.expiry, dt_timezone.utc)
+        user.save(update_fields=['access_token', 'token_expires_at'])
+
+    return credentials
+
+
+class ClassroomSync:
+    """Sincronizar datos desde Google Classroom para un usuario"""
+
+    def __init__(self, user, progress_callback=None, concurrency=None, full_resync=False, job=None):
+        self.user = user
+        self.job = job
+        self.full_resync = full_resync
+        self.progress_callback = progress_callback
+        self.concurrency = concurrency or settings.CLASSROOM_SYNC_CONCURRENCY
+        self.errors = {}
+        self._errors_lock = threading.Lock()
+        self._local = threading.local()
+        self.scheduler = QuotaScheduler(user_key=user.pk)
+        self.courses = []
+
+    def run(self):
+        """Ejecutar la sincronización completa y devolver los totales"""
+        self.credentials = get_user_credentials(self.user)
+
+        # Construir servicio de Classroom
+        service = classroom_service(self.credentials)
+
+        # Sincronizar cursos
+        try:
+            with self._phase(None, 'courses') as log:
+                courses_synced = self._sync_courses(service, self.user, log)
+        finally:
+            self._flush_phase_logs()
+
+        totals = {
+            'courses_synced': courses_synced,
+            'courses_skipped': 0,
+            'coursework_synced': 0,
+            'submissions_synced': 0,
+            'submissions_inserted': 0,
+            'submissions_updated': 0,
+        }
+
+        # Resolver usuarios desde memoria durante toda la sincronización
+        self.identities = UserIdentityMap()
+
+        courses = self.courses = list(Course.objects.all())
+        self._report_progress(0, len(courses), totals)
+
+        # Sincronizar inscripciones, tareas y entregas de los cursos en paralelo
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._sync_course, course) for course in courses]
+
+            for processed, future in enumerate(as_completed(futures), start=1):
+                for field, count in future.result().items():
+                    totals[field] += count
+                self._report_progress(processed, len(courses), totals)
+
+        return {**totals, **self.scheduler.metrics()}
+
+    def _sync_course(self, course):
+        """Sincronizar un curso con su advisory lock tomado dentro de un hilo del pool"""
+        try:
+            with course_lock(course.pk, wait=self.full_resync) as acquired:
+                # La frescura se comprueba con el lock tomado: otro trabajo pudo terminar el curso
+                if not acquired or (not self.full_resync and is_course_fresh(course.pk)):
+                    return {'courses_skipped': 1}
+                return self._sync_locked_course(course)
+        except Exception as e:
+            self._record_error(course, 'curso', e)
+            return {}
+        finally:
+            self._flush_phase_logs()
+            # Cada hilo usa su propia conexión; cerrarla para no dejarla abierta
+            connection.close()
+
+    def _sync_locked_course(self, course):
+        """Sincronizar inscripciones, tareas, entregas y progreso de un curso"""
+        service = self._get_thread_service()
+        synced_at = timezone.now()
+        with self._phase(course, 'enrollments') as log:
+            self._sync_enrollments(service, course, self.user, log)
+
+        with self._phase(course, 'coursework') as log:
+            changed_ids, watermark = self._sync_coursework(service, course, self.user, log)
+
+        # Las entregas y notas nuevas no cambian el updateTime de su tarea: en modo
+        # incremental se listan las de todo el curso y el upserter escribe solo las que cambiaron
+        with self._phase(course, 'submissions') as log:
+            upserter = self._sync_submissions(service, course, self.user, course_wide=not self.full_resync)
+            log.items_inserted = upserter.inserted
+            log.items_updated = upserter.updated
+            log.items_unchanged = upserter.unchanged
+            log.items_processed = upserter.inserted + upserter.updated + upserter.unchanged
+
+        with self._phase(course, 'progress') as log:
+            log.items_processed = self._refresh_progress(course, changed_ids, upserter)
+
+        # Avanzar la marca de agua y la frescura solo si el curso se sincronizó sin errores
+        if course.google_course_id not in self.errors:
+            fields = {'last_synced_at': synced_at}
+            if watermark:
+                fields['coursework_watermark'] = watermark
+            Course.objects.filter(pk=course.pk).update(**fields)
+
+        return {
+            'coursework_synced': len(changed_ids),
+            'submissions_synced': upserter.inserted + upserter.updated + upserter.unchanged,
+            'submissions_inserted': upserter.inserted,
+            'submissions_updated': upserter.updated,
+        }
+
+    @contextmanager
+    def _phase(self, course, sync_type):
+        """Medir una fase de la sincronización y registrarla como SyncLog del trabajo"""
+        log = SyncLog(user=self.user, job=self.job, course=course, sync_type=sync_type, started_at=timezone.now())
+        counters = {}
+        errors = self._local.phase_errors = []
+        started = perf_counter()
+        try:
+            with self.scheduler.track(counters):
+                yield log
+        except Exception as e:
+            errors.append(str(e))
+            raise
+        finally:
+            self._local.phase_errors = None
+            log.duration_seconds = round(perf_counter() - started, 3)
+            log.api_calls = counters.get('api_calls', 0)
+            log.pages = counters.get('pages', 0)
+            log.throttled_seconds = round(counters.get('throttled_seconds', 0), 3)
+            if errors:
+                log.status = 'partial' if log.items_processed else 'error'
+                log.message = '\n'.join(errors)
+            else:
+                log.status = 'success'
+            if not hasattr(self._local, 'phase_logs'):
+                self._local.phase_logs = []
+            self._local.phase_logs.append(log)
+
+    def _flush_phase_logs(self):
+        """Guardar los registros de fase pendientes del hilo actual"""
+        logs = getattr(self._local, 'phase_logs', None)
+        self._local.phase_logs = []
+        if not logs:
+            return
+        try:
+            SyncLog.objects.bulk_create(logs)
+        except Exception as e:
+            # La telemetría no debe hacer fallar la sincronización
+            with self._errors_lock:
+                self.errors.setdefault('telemetria', []).append(f"Error guardando registros de fase: {e}")
+
+    def _refresh_progress(self, course, changed_coursework_ids, upserter):
+        """Actualizar el resumen de progreso de los estudiantes afectados
+
+        Devuelve el número de resúmenes escritos.
+        """
+        try:
+            if changed_coursework_ids:
+                # Tareas nuevas o modificadas cambian los totales de todo el curso
+                return refresh_course_progress(course.pk)
+            user_ids = upserter.changed_user_ids | students_without_progress(course.pk)
+            return refresh_course_progress(course.pk, user_ids)
+        except Exception as e:
+            self._record_error(course, 'resumen de progreso', e)
+            return 0
+
+    def _get_thread_service(self):
+        """Cliente de Classroom propio de cada hilo (httplib2 no es thread-safe)"""
+        if not hasattr(self._local, 'service'):
+            self._local.service = classroom_service(self.credentials)
+        return self._local.service
+
+    def _record_error(self, course, phase, error):
+        message = f"Error sincronizando {phase} para {course.name}: {error}"
+        phase_errors = getattr(self._local, 'phase_errors', None)
+        if phase_errors is not None:
+            phase_errors.append(message)
+        with self._errors_lock:
+            self.errors.setdefault(course.google_course_id, []).append(message)
+
+    def _report_progress(self, processed, total, totals):
+        if self.progress_callback:
+            self.progress_callback(processed, total, {**totals, **self.scheduler.metrics()})
+
+    def _sync_courses(self, service, user, log):
+        """Sincronizar cursos desde Google Classroom"""
+        synced_count = 0
+        for course_data in iter_items(service.courses().list, 'courses', scheduler=self.scheduler):
+            course, created = Course.objects.update_or_create(
+                google_course_id=course_data['id'],
+                defaults={
+                    'name': course_data['name'],
+                    'description': course_data.get('description', ''),
+                    'section': course_data.get('section', ''),
+                    'room': course_data.get('room', ''),
+                    'owner_id': course_data['ownerId'],
+                    'creation_time': datetime.fromisoformat(course_data['creationTime'].replace('Z', '+00:00')),
+                    'update_time': datetime.fromisoformat(course_data['updateTime'].replace('Z', '+00:00')),
+                    'enrollment_code': course_data.get('enrollmentCode', ''),
+                    'course_state': course_data['courseState'],
+                    'alternate_link': course_data['alternateLink'],
+                }
+            )
+            synced_count += 1
+            if created:
+                log.items_inserted += 1
+            else:
+                log.items_updated += 1
+
+        log.items_processed = synced_count
+        return synced_count
+
+    def _sync_enrollments(self, service, course, user, log):
+        """Sincronizar inscripciones de un curso"""
+        try:
+            # Estudiantes y profesores viajan en una sola petición batch
+            batch = BatchLister(service, scheduler=self.scheduler)
+            batch.add(
+                service.courses().students().list,
+                'students',
+                lambda students: self._save_enrollments(course, students, 'STUDENT', log),
+                key='students',
+                courseId=course.google_course_id
+            )
+            batch.add(
+                service.courses().teachers().list,
+                'teachers',
+                lambda teachers: self._save_enrollments(course, teachers, 'TEACHER', log),
+                key='teachers',
+                courseId=course.google_course_id
+            )
+            for key, error in batch.execute():
+                self._record_error(course, 'inscripciones', error)
+
+        except Exception as e:
+            self._record_error(course, 'inscripciones', e)
+
+    def _save_enrollments(self, course, people, role, log):
+        """Guardar usuarios e inscripciones con el rol indicado"""
+        log.items_processed += len(people)
+        unresolved = self.identities.ensure(people, role.lower())
+        if unresolved:
+            emails = ', '.join(person_data['profile']['emailAddress'] for person_data in unresolved)
+            self._record_error(
+                course,
+                'inscripciones',
+                f"{len(unresolved)} usuario(s) en conflicto con otro usuario existente: {emails}"
+            )
+
+        enrollments = [
+            CourseEnrollment(course=course, user_id=user_id, role=role)
+            for user_id in (self.identities.get(person_data['userId']) for person_data in people)
+            if user_id is not None
+        ]
+        CourseEnrollment.objects.bulk_create(enrollments, ignore_conflicts=True)
+
+    def _sync_coursework(self, service, course, user, log):
+        """Sincronizar tareas de un curso; devuelve los IDs guardados y la nueva marca de agua"""
+        synced_ids = []
+        watermark = None if self.full_resync else course.coursework_watermark
+        new_watermark = course.coursework_watermark
+        try:
+            coursework_items = iter_items(
+                service.courses().courseWork().list,
+                'courseWork',
+                courseId=course.google_course_id,
+                orderBy='updateTime desc',
+                scheduler=self.scheduler
+            )
+
+            for coursework_data in coursework_items:
+                update_time = datetime.fromisoformat(coursework_data['updateTime'].replace('Z', '+00:00'))
+                # Ordenadas por updateTime descendente: el resto no cambió desde la marca de agua
+                if watermark and update_time <= watermark:
+                    break
+
+                due_date = None
+                due_time = None
+
+                if 'dueDate' in coursework_data:
+                    due_date_data = coursework_data['dueDate']
+                    due_date = datetime(
+                        due_date_data['year'],
+                        due_date_data['month'],
+                        due_date_data['day']
+                    )
+
+                    if 'dueTime' in coursework_data:
+                        due_time_data = coursework_data['dueTime']
+                        due_time = time(
+                            due_time_data.get('hours', 23),
+                            due_time_data.get('minutes', 59)
+                        )
+
+                coursework, created = CourseWork.objects.update_or_create(
+                    google_coursework_id=coursework_data['id'],
+                    defaults={
+                        'course': course,
+                        'title': coursework_data['title'],
+                        'description': coursework_data.get('description', ''),
+                        'state': coursework_data['state'],
+                        'alternate_link': coursework_data['alternateLink'],
+                        'creation_time': datetime.fromisoformat(coursework_data['creationTime'].replace('Z', '+00:00')),
+                        'update_time': update_time,
+                        'due_date': due_date,
+                        'due_time': due_time,
+                        'max_points': coursework_data.get('maxPoints'),
+                        'work_type': coursework_data['workType']
+                    }
+                )
+                synced_ids.append(coursework.google_coursework_id)
+                if created:
+                    log.items_inserted += 1
+                else:
+                    log.items_updated += 1
+                log.items_processed += 1
+                if new_watermark is None or update_time > new_watermark:
+                    new_watermark = update_time
+
+        except Exception as e:
+            self._record_error(course, 'tareas', e)
+
+        return synced_ids, new_watermark
+
+    def _sync_submissions(self, service, course, user, course_wide=False):
+        """Sincronizar entregas de un curso; devuelve el SubmissionUpserter usado
+
+        Con `course_wide`, o si el curso tiene muchas tareas, se pide un único
+        listado de todo el curso en lugar de uno por tarea.
+        """
+        upserter = SubmissionUpserter()
+        try:
+            coursework_by_id = {
+                coursework.google_coursework_id: coursework
+                for coursework in CourseWork.objects.filter(course=course)
+            }
+
+            if course_wide or len(coursework_by_id) >= settings.CLASSROOM_SYNC_COURSE_WIDE_THRESHOLD:
+                self._fetch_course_submissions(service, course, coursework_by_id, upserter)
+            else:
+                self._fetch_coursework_submissions(service, course, coursework_by_id, upserter)
+
+            upserter.flush()
+
+        except Exception as e:
+            self._record_error(course, 'entregas', e)
+
+        return upserter
+
+    def _fetch_coursework_submissions(self, service, course, coursework_by_id, upserter):
+        """Pedir las entregas con una llamada list por tarea, agrupadas en batch"""
+        batch = BatchLister(service, scheduler=self.scheduler)
+
+        for coursework in coursework_by_id.values():
+            batch.add(
+                service.courses().courseWork().studentSubmissions().list,
+                'studentSubmissions',
+                lambda submissions, coursework=coursework: self._save_submissions(
+                    coursework, submissions, upserter
+                ),
+                key=coursework.google_coursework_id,
+                courseId=course.google_course_id,
+                courseWorkId=coursework.google_coursework_id
+            )
+
+        for coursework_id, error in batch.execute():
+            self._record_error(course, f'entregas de la tarea {coursework_id}', error)
+
+    def _fetch_course_submissions(self, service, course, coursework_by_id, upserter):
+        """Pedir todas las entregas del curso con courseWorkId '-' y agruparlas por tarea"""
+        pages = iter_pages(
+            service.courses().courseWork().studentSubmissions().list,
+            'studentSubmissions',
+            courseId=course.google_course_id,
+            courseWorkId='-',
+            scheduler=self.scheduler
+        )
+
+        for page in pages:
+            by_coursework = defaultdict(list)
+            for submission_data in page:
+                by_coursework[submission_data['courseWorkId']].append(submission_data)
+
+            for coursework_id, submissions in by_coursework.items():
+                # Las tareas que no se están sincronizando se ignoran
+                coursework = coursework_by_id.get(coursework_id)
+                if coursework is not None:
+                    self._save_submissions(coursework, submissions, upserter)
+
+    def _save_submissions(self, coursework, submissions, upserter):
+        """Preparar las entregas de una tarea para la escritura por lotes"""
+        for submission_data in submissions:
+            # Resolver el usuario por Google ID desde memoria
+            user_id = self.identities.get(submission_data['userId'])
+            if user_id is None:
+                continue
+
+            upserter.add(StudentSubmission(
+                google_submission_id=submission_data['id'],
+                coursework=coursework,
+                user_id=user_id,
+                creation_time=datetime.fromisoformat(submission_data['creationTime'].replace('Z', '+00:00')),
+                update_time=datetime.fromisoformat(submission_data['updateTime'].replace('Z', '+00:00')),
+                state=submission_data['state'],
+                late=submission_data.get('late', False),
+                draft_grade=submission_data.get('draftGrade'),
+                assigned_grade=submission_data.get('assignedGrade'),
+                alternate_link=submission_data['alternateLink']
+            ))
+
+
+class UserIdentityMap:
+    """Mapa google_id → pk de usuario válido durante una sincronización
+
+    Carga todos los pares conocidos en una sola consulta y crea en bloque
+    los usuarios que falten; el resto de resoluciones se hace en memoria.
+    Es seguro compartirlo entre los hilos del pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = dict(
+            User.objects.filter(google_id__isnull=False).values_list('google_id', 'pk')
+        )
+
+    def get(self, google_id):
+        return self._ids.get(google_id)
+
+    def ensure(self, people, role):
+        """Crear en bloque los usuarios de Classroom que aún no existen
+
+        Devuelve los datos de las personas que siguen sin usuario.
+        """
+        missing = {
+            person_data['userId']: person_data for person_data in people
+            if person_data['userId'] not in self._ids
+        }
+        if not missing:
+            return []
+
+        with self._lock:
+            missing = {google_id: data for google_id, data in missing.items() if google_id not in self._ids}
+            if not missing:
+                return []
+
+            User.objects.bulk_create([
+                User(
+                    google_id=google_id,
+                    username=person_data['profile']['emailAddress'],
+                    email=person_data['profile']['emailAddress'],
+                    google_email=person_data['profile']['emailAddress'],
+                    google_name=person_data['profile']['name']['fullName'],
+                    role=role
+                )
+                for google_id, person_data in missing.items()
+            ], ignore_conflicts=True)
+
+            # ignore_conflicts no devuelve pks; leer los creados (o ya existentes)
+            self._ids.update(
+                User.objects.filter(google_id__in=list(missing)).values_list('google_id', 'pk')
+            )
+            # Un usuario con el mismo username o google_email bajo otro google_id hace que se ignore la fila
+            return [person_data for google_id, person_data in missing.items() if google_id not in self._ids]
+
+
+class SubmissionUpserter:
+    """Acumular entregas y escribirlas por lotes con INSERT ... ON CONFLICT
+
+    Cada lote se escribe en su propia transacción. Antes de escribir se
+    consulta el updateTime guardado de las entregas del lote: solo se
+    escriben las nuevas y las que cambiaron, y se anotan sus estudiantes
+    para actualizar el resumen de progreso.
+    """
+
+    UPDATE_FIELDS = [
+        'coursework', 'user', 'creation_time', 'update_time', 'state',
+        'late', 'draft_grade', 'assigned_grade', 'alternate_link',
+    ]
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.CLASSROOM_SYNC_UPSERT_CHUNK_SIZE
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.changed_user_ids = set()
+        self._buffer = {}
+
+    def add(self, submission):
+        # Indexar por ID evita repetir una fila en el mismo INSERT, que Postgres rechaza
+        self._buffer[submission.google_submission_id] = submission
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Escribir las entregas acumuladas"""
+        if not self._buffer:
+            return
+
+        chunk, self._buffer = self._buffer, {}
+        with transaction.atomic():
+            existing = dict(
+                StudentSubmission.objects.filter(google_submission_id__in=list(chunk))
+                .values_list('google_submission_id', 'update_time')
+            )
+            changed = [
+                submission for submission_id, submission in chunk.items()
+                if existing.get(submission_id) != submission.update_time
+            ]
+            if changed:
+                StudentSubmission.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['google_submission_id'],
+                    update_fields=self.UPDATE_FIELDS
+                )
+
+        inserted = sum(1 for submission in changed if submission.google_submission_id not in existing)
+        self.inserted += inserted
+        self.updated += len(changed) - inserted
+        self.unchanged += len(chunk) - len(changed)
+        self.changed_user_ids.update(submission.user_id for submission in changed)
@@ -0,0 +1,88 @@
+from celery import shared_task
+from django.utils import timezone
+from .models import SyncJob, SyncLog
+from .sync import ClassroomSync
+from .caching import invalidate_dashboard_cache
+from .coordination import get_or_create_sync_job
+
+
+@shared_task
+def sync_classroom_data(job_id):
+    """Ejecutar en segundo plano la sincronización con Google Classroom"""
+    # Tomar el trabajo solo si sigue en cola: si expiró mientras esperaba un
+    # worker, su alcance puede tener ya otro trabajo activo
+    claimed = SyncJob.objects.filter(id=job_id, status='pending').update(
+        status='running',
+        started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = SyncJob.objects.select_related('user').get(id=job_id)
+
+    def report_progress(processed, total, totals):
+        SyncJob.objects.filter(id=job.id).update(
+            courses_processed=processed,
+            courses_total=total,
+            **totals
+        )
+
+    sync = ClassroomSync(job.user, progress_callback=report_progress, full_resync=job.full_resync, job=job)
+    try:
+        totals = sync.run()
+    except Exception as e:
+        invalidate_dashboard_cache(course.cohort for course in sync.courses)
+        SyncLog.objects.create(
+            user=job.user,
+            job=job,
+            sync_type='full',
+            status='error',
+            message=str(e)
+        )
+        SyncJob.objects.filter(id=job.id).update(
+            status='error',
+            message=str(e),
+            finished_at=timezone.now()
+        )
+        raise
+
+    # Las estadísticas cacheadas de los cursos sincronizados dejan de ser válidas
+    invalidate_dashboard_cache(course.cohort for course in sync.courses)
+
+    if sync.errors:
+        job_status = 'partial'
+        message = f'Sincronización completada con errores en {len(sync.errors)} curso(s)'
+    else:
+        job_status = 'success'
+        message = 'Sincronización completada'
+
+    SyncJob.objects.filter(id=job.id).update(
+        status=job_status,
+        message=message,
+        errors=sync.errors,
+        finished_at=timezone.now(),
+        **totals
+    )
+    return totals
+
+
+@shared_task
+def schedule_full_resync():
+    """Encolar la resincronización completa periódica (Celery beat)
+
+    Usa las credenciales del último usuario que sincronizó con éxito. Las
+    fases por curso recorren todos los cursos guardados, así que basta un
+    trabajo para poner al día entregas y notas.
+    """
+    last_job = SyncJob.objects.filter(
+        status__in=['success', 'partial'],
+        user__refresh_token__isnull=False
+    ).select_related('user').first()
+    if last_job is None:
+        return None
+
+    job, created = get_or_create_sync_job(last_job.user, full_resync=True)
+    if created:
+        result = sync_classroom_data.delay(str(job.id))
+        job.task_id = result.id
+        job.save(update_fields=['task_id'])
+    return str(job.id)
@@ -0,0 +1,213 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from .coordination import get_or_create_sync_job
+from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncJob
+from .progress import refresh_course_progress
+from .sync import UserIdentityMap
+from .tasks import sync_classroom_data
+
+
+NOW = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+# Notas representables exactamente en coma flotante para comparar promedios
+GRADES = [None, 6.0, 7.5, 8.25, 10.0]
+STATES = ['TURNED_IN', 'TURNED_IN', 'CREATED', 'RETURNED', 'NEW']
+
+
+def legacy_student_progress(enrollments):
+    """Cálculo original por inscripción, como referencia de la respuesta esperada"""
+    progress_data = []
+    for enrollment in enrollments:
+        course = enrollment.course
+        student = enrollment.user
+
+        total_assignments = CourseWork.objects.filter(course=course).count()
+        submissions = StudentSubmission.objects.filter(coursework__course=course, user=student)
+
+        completed_assignments = submissions.filter(state='TURNED_IN').count()
+        late_assignments = submissions.filter(late=True, state='TURNED_IN').count()
+
+        completion_percentage = (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
+
+        grades = submissions.filter(assigned_grade__isnull=False).values_list('assigned_grade', flat=True)
+        average_grade = sum(grades) / len(grades) if grades else None
+
+        progress_data.append({
+            'student_id': student.id,
+            'student_name': student.google_name,
+            'student_email': student.google_email,
+            'course_id': course.id,
+            'course_name': course.name,
+            'total_assignments': total_assignments,
+            'completed_assignments': completed_assignments,
+            'late_assignments': late_assignments,
+            'completion_percentage': round(completion_percentage, 2),
+            'average_grade': round(average_grade, 2) if average_grade else None
+        })
+    return progress_data
+
+
+class StudentProgressViewTests(TestCase):
+    """El progreso de estudiantes se calcula con un número fijo de consultas"""
+
+    PATH = '/api/students/progress/'
+
+    def setUp(self):
+        self.coordinator = User.objects.create(username='coordinador', role='coordinator')
+        self.client.force_login(self.coordinator)
+        self.course = Course.objects.create(
+            google_course_id='curso-1',
+            name='Curso 1',
+            owner_id='profesor-1',
+            creation_time=NOW,
+            update_time=NOW,
+            alternate_link='https://classroom.google.com/c/1',
+        )
+        self.coursework = [
+            CourseWork.objects.create(
+                google_coursework_id=f'tarea-{index}',
+                course=self.course,
+                title=f'Tarea {index}',
+                alternate_link=f'https://classroom.google.com/c/1/a/{index}',
+                creation_time=NOW,
+                update_time=NOW,
+            )
+            for index in range(4)
+        ]
+        self.students = 0
+
+    def add_students(self, count):
+        """Inscribir `count` estudiantes con entregas variadas y recalcular el resumen"""
+        for _ in range(count):
+            index = self.students
+            self.students += 1
+            student = User.objects.create(
+                username=f'alumno{index}',
+                google_email=f'alumno{index}@ejemplo.edu',
+                google_name=f'Alumno {index:03d}',
+            )
+            CourseEnrollment.objects.create(course=self.course, user=student, role='STUDENT')
+            for offset, coursework in enumerate(self.coursework[:index % 5]):
+                variant = (index + offset) % 5
+                StudentSubmission.objects.create(
+                    google_submission_id=f'entrega-{index}-{offset}',
+                    coursework=coursework,
+                    user=student,
+                    creation_time=NOW,
+                    update_time=NOW,
+                    state=STATES[variant],
+                    late=variant == 1,
+                    assigned_grade=GRADES[variant],
+                    alternate_link=f'https://classroom.google.com/c/1/s/{index}-{offset}',
+                )
+        refresh_course_progress(self.course.pk)
+
+    def get_progress(self):
+        response = self.client.get(self.PATH, {'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_query_count_does_not_grow_with_enrollments(self):
+        self.add_students(5)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(len(self.get_progress()), 5)
+
+        self.add_students(45)
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.assertEqual(len(self.get_progress()), 50)
+
+    def test_matches_per_enrollment_computation(self):
+        self.add_students(20)
+        enrollments = CourseEnrollment.objects.filter(role='STUDENT').select_related('course', 'user')
+
+        def by_student(rows):
+            return sorted(rows, key=lambda row: (row['student_id'], row['course_id']))
+
+        self.assertEqual(by_student(self.get_progress()), by_student(legacy_student_progress(enrollments)))
+
+
+class AdminProgressRefreshTests(TestCase):
+    """Las ediciones en el admin se reflejan en las estadísticas del dashboard"""
+
+    def test_submission_edit_updates_stats(self):
+        admin_user = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        course = Course.objects.create(
+            google_course_id='curso-1',
+            name='Curso 1',
+            owner_id='profesor-1',
+            creation_time=NOW,
+            update_time=NOW,
+            alternate_link='https://classroom.google.com/c/1',
+        )
+        coursework = CourseWork.objects.create(
+            google_coursework_id='tarea-1',
+            course=course,
+            title='Tarea 1',
+            alternate_link='https://classroom.google.com/c/1/a/1',
+            creation_time=NOW,
+            update_time=NOW,
+        )
+        student = User.objects.create(username='alumno', google_name='Alumno')
+        CourseEnrollment.objects.create(course=course, user=student, role='STUDENT')
+        submission = StudentSubmission.objects.create(
+            google_submission_id='entrega-1',
+            coursework=coursework,
+            user=student,
+            creation_time=NOW,
+            update_time=NOW,
+            state='CREATED',
+            alternate_link='https://classroom.google.com/c/1/s/1',
+        )
+        refresh_course_progress(course.pk)
+
+        stats = self.client.get('/api/dashboard/stats/').json()
+        self.assertEqual((stats['submissions_pending'], stats['submissions_on_time']), (1, 0))
+
+        response = self.client.post(f'/admin/core/studentsubmission/{submission.pk}/change/', {
+            'user': student.pk,
+            'coursework': coursework.pk,
+            'state': 'TURNED_IN',
+            'draft_grade': '',
+            'assigned_grade': '',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        stats = self.client.get('/api/dashboard/stats/').json()
+        self.assertEqual((stats['submissions_pending'], stats['submissions_on_time']), (0, 1))
+
+
+class SyncJobClaimTests(TestCase):
+    """Un worker atrasado no reactiva un trabajo que expiró en cola"""
+
+    def test_expired_pending_job_is_not_run(self):
+        user = User.objects.create(username='profesor')
+        expired, _ = get_or_create_sync_job(user, full_resync=False)
+        SyncJob.objects.filter(id=expired.id).update(status='error', finished_at=NOW)
+        active, created = get_or_create_sync_job(user, full_resync=False)
+        self.assertTrue(created)
+
+        self.assertIsNone(sync_classroom_data(str(expired.id)))
+        self.assertEqual(SyncJob.objects.get(id=expired.id).status, 'error')
+        self.assertEqual(SyncJob.objects.get(id=active.id).status, 'pending')
+
+
+class UserIdentityMapTests(TestCase):
+    """Los usuarios de Classroom que no se pueden crear se informan"""
+
+    def person(self, google_id, email):
+        return {'userId': google_id, 'profile': {'emailAddress': email, 'name': {'fullName': email}}}
+
+    def test_conflicting_users_are_reported(self):
+        User.objects.create(username='alumno@ejemplo.edu', google_id='otro', google_email='alumno@ejemplo.edu')
+        identities = UserIdentityMap()
+
+        unresolved = identities.ensure([
+            self.person('nuevo', 'nuevo@ejemplo.edu'),
+            self.person('duplicado', 'alumno@ejemplo.edu'),
+        ], 'student')
+
+        self.assertEqual([person['userId'] for person in unresolved], ['duplicado'])
+        self.assertIsNotNone(identities.get('nuevo'))
+        self.assertIsNone(identities.get('duplicado'))
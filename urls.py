@@ -16,8 +16,19 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from core import views as core_views
+from core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/dashboard/bootstrap/', core_views.DashboardBootstrapView.as_view(), name='dashboard-bootstrap'),
+    path('api/sync/jobs/<uuid:job_id>/', core_views.SyncJobStatusView.as_view(), name='sync-job-status'),
+    path('api/sync/jobs/<uuid:job_id>/phases/', core_views.SyncJobPhasesView.as_view(), name='sync-job-phases'),
+    path('api/sync/phases/slowest/', core_views.SyncPhaseStatsView.as_view(), name='sync-phases-slowest'),
+    path('api/teachers/', core_views.TeacherListView.as_view(), name='teacher-list'),
+    path('api/export/progress/', core_views.ExportStudentProgressView.as_view(), name='export-progress'),
+    path('api/export/submissions/', core_views.ExportSubmissionsView.as_view(), name='export-submissions'),
+    path('api/export/coursework/', core_views.ExportCourseWorkView.as_view(), name='export-coursework'),
     path('api/', include('core.urls')),
 ]
@@ -1,25 +1,39 @@
 import os
 import json
-from datetime import datetime, timedelta
+from datetime import timedelta, timezone as dt_timezone
 from django.conf import settings
 from django.shortcuts import redirect
+from django.utils import timezone
 from django.contrib.auth import login
 from django.http import JsonResponse
-from django.db.models import Count, Q, Avg
+from django.db.models import (
+    Count, Q, Avg, Sum, Max, F, Func, Case, When, Value, FloatField, IntegerField, OuterRef, Subquery
+)
+from django.db.models.functions import Coalesce
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, viewsets
+from rest_framework import status, viewsets, generics
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from .models import User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog
+from .models import (
+    User, Course, CourseEnrollment, CourseWork, StudentSubmission, SyncLog, SyncJob,
+    StudentCourseProgress
+)
 from .serializers import (
     UserSerializer, CourseSerializer, CourseEnrollmentSerializer,
     CourseWorkSerializer, StudentSubmissionSerializer, SyncLogSerializer,
-    DashboardStatsSerializer, CourseProgressSerializer, StudentProgressSerializer
+    DashboardStatsSerializer, CourseProgressSerializer, StudentProgressSerializer,
+    SyncJobSerializer, TeacherSerializer, SyncPhaseSerializer, SyncPhaseStatsSerializer
 )
+from .tasks import sync_classroom_data
+from .caching import get_dashboard_cache, set_dashboard_cache
+from .pagination import CoursePagination, StudentProgressPagination, TeacherPagination
+from .exports import EXPORT_CHUNK_SIZE, stream_csv
+from .conditional import SyncConditionalMixin
+from .coordination import get_or_create_sync_job
+from .google_clients import oauth2_service
+from .metrics import google_endpoint, observe_google_call
 
 
 # Configuración de OAuth 2.0
@@ -95,8 +109,10 @@ class GoogleCallbackView(APIView):
             credentials = flow.credentials
             
             # Obtener información del usuario de Google
-            user_info_service = build('oauth2', 'v2', credentials=credentials)
-            user_info = user_info_service.userinfo().get().execute()
+            user_info_service = oauth2_service(credentials)
+            user_info_request = user_info_service.userinfo().get()
+            with observe_google_call(google_endpoint(user_info_request)):
+                user_info = user_info_request.execute()
             
             # Crear o actualizar usuario
             user, created = User.objects.get_or_create(
@@ -114,9 +130,10 @@ class GoogleCallbackView(APIView):
             
             # Actualizar tokens
             user.access_token = credentials.token
-            user.refresh_token = credentials.refresh_token
+            if credentials.refresh_token:
+                user.refresh_token = credentials.refresh_token
             if credentials.expiry:
-                user.token_expires_at = credentials.expiry
+                user.token_expires_at = timezone.make_aware(credentials.expiry, dt_timezone.utc)
             user.save()
             
             # Iniciar sesión
@@ -150,361 +167,671 @@ class UserProfileView(APIView):
 
 
 class SyncClassroomDataView(APIView):
-    """Sincronizar datos desde Google Classroom"""
+    """Encolar la sincronización de datos desde Google Classroom"""
     
     def post(self, request):
         if not request.user.is_authenticated:
             return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
         
+        if not request.session.get('credentials'):
+            return Response({'error': 'No hay credenciales disponibles'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        job = None
         try:
-            # Obtener credenciales del usuario
-            credentials_data = request.session.get('credentials')
-            if not credentials_data:
-                return Response({'error': 'No hay credenciales disponibles'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            credentials = Credentials(
-                token=credentials_data['token'],
-                refresh_token=credentials_data['refresh_token'],
-                token_uri=credentials_data['token_uri'],
-                client_id=credentials_data['client_id'],
-                client_secret=credentials_data['client_secret'],
-                scopes=credentials_data['scopes']
+            # Si ya hay una sincronización equivalente en curso, sumarse a ella
+            job, created = get_or_create_sync_job(
+                request.user,
+                full_resync=bool(request.data.get('full_resync', False))
             )
-            
-            # Refrescar token si es necesario
-            if credentials.expired:
-                credentials.refresh(Request())
-            
-            # Construir servicio de Classroom
-            service = build('classroom', 'v1', credentials=credentials)
-            
-            # Sincronizar cursos
-            courses_synced = self._sync_courses(service, request.user)
-            
-            # Sincronizar inscripciones y tareas para cada curso
-            coursework_synced = 0
-            submissions_synced = 0
-            
-            for course in Course.objects.all():
-                # Sincronizar inscripciones
-                self._sync_enrollments(service, course, request.user)
-                
-                # Sincronizar tareas
-                coursework_count = self._sync_coursework(service, course, request.user)
-                coursework_synced += coursework_count
-                
-                # Sincronizar entregas
-                submissions_count = self._sync_submissions(service, course, request.user)
-                submissions_synced += submissions_count
-            
-            return Response({
-                'message': 'Sincronización completada',
-                'courses_synced': courses_synced,
-                'coursework_synced': coursework_synced,
-                'submissions_synced': submissions_synced
-            })
+            if created:
+                result = sync_classroom_data.delay(str(job.id))
+                job.task_id = result.id
+                job.save(update_fields=['task_id'])
             
         except Exception as e:
+            if job is not None and created:
+                # Liberar el alcance para que la siguiente petición pueda encolar otro trabajo
+                SyncJob.objects.filter(id=job.id).update(status='error', message=str(e), finished_at=timezone.now())
             SyncLog.objects.create(
                 user=request.user,
+                job=job,
                 sync_type='full',
                 status='error',
                 message=str(e)
             )
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({
+            'message': 'Sincronización en cola' if created else 'Ya hay una sincronización en curso',
+            'job_id': str(job.id),
+            'status': job.status,
+            'joined': not created
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SyncJobStatusView(APIView):
+    """Consultar el estado de un trabajo de sincronización"""
     
-    def _sync_courses(self, service, user):
-        """Sincronizar cursos desde Google Classroom"""
-        try:
-            results = service.courses().list(pageSize=100).execute()
-            courses = results.get('courses', [])
-            
-            synced_count = 0
-            for course_data in courses:
-                course, created = Course.objects.update_or_create(
-                    google_course_id=course_data['id'],
-                    defaults={
-                        'name': course_data['name'],
-                        'description': course_data.get('description', ''),
-                        'section': course_data.get('section', ''),
-                        'room': course_data.get('room', ''),
-                        'owner_id': course_data['ownerId'],
-                        'creation_time': datetime.fromisoformat(course_data['creationTime'].replace('Z', '+00:00')),
-                        'update_time': datetime.fromisoformat(course_data['updateTime'].replace('Z', '+00:00')),
-                        'enrollment_code': course_data.get('enrollmentCode', ''),
-                        'course_state': course_data['courseState'],
-                        'alternate_link': course_data['alternateLink'],
-                    }
-                )
-                synced_count += 1
-            
-            SyncLog.objects.create(
-                user=user,
-                sync_type='courses',
-                status='success',
-                items_processed=synced_count
-            )
-            
-            return synced_count
-            
-        except Exception as e:
-            SyncLog.objects.create(
-                user=user,
-                sync_type='courses',
-                status='error',
-                message=str(e)
-            )
-            raise e
-    
-    def _sync_enrollments(self, service, course, user):
-        """Sincronizar inscripciones de un curso"""
+    def get(self, request, job_id):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
         try:
-            # Obtener estudiantes
-            students = service.courses().students().list(courseId=course.google_course_id).execute()
-            for student_data in students.get('students', []):
-                student_user, created = User.objects.get_or_create(
-                    google_id=student_data['userId'],
-                    defaults={
-                        'username': student_data['profile']['emailAddress'],
-                        'email': student_data['profile']['emailAddress'],
-                        'google_email': student_data['profile']['emailAddress'],
-                        'google_name': student_data['profile']['name']['fullName'],
-                        'role': 'student'
-                    }
-                )
-                
-                CourseEnrollment.objects.get_or_create(
-                    course=course,
-                    user=student_user,
-                    defaults={'role': 'STUDENT'}
-                )
-            
-            # Obtener profesores
-            teachers = service.courses().teachers().list(courseId=course.google_course_id).execute()
-            for teacher_data in teachers.get('teachers', []):
-                teacher_user, created = User.objects.get_or_create(
-                    google_id=teacher_data['userId'],
-                    defaults={
-                        'username': teacher_data['profile']['emailAddress'],
-                        'email': teacher_data['profile']['emailAddress'],
-                        'google_email': teacher_data['profile']['emailAddress'],
-                        'google_name': teacher_data['profile']['name']['fullName'],
-                        'role': 'teacher'
-                    }
-                )
-                
-                CourseEnrollment.objects.get_or_create(
-                    course=course,
-                    user=teacher_user,
-                    defaults={'role': 'TEACHER'}
-                )
-                
-        except Exception as e:
-            print(f"Error sincronizando inscripciones para {course.name}: {e}")
+            job = SyncJob.objects.get(id=job_id, user=request.user)
+        except SyncJob.DoesNotExist:
+            return Response({'error': 'Sincronización no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = SyncJobSerializer(job)
+        return Response(serializer.data)
+
+
+class SyncJobPhasesView(APIView):
+    """Fases de un trabajo de sincronización, de la más lenta a la más rápida"""
     
-    def _sync_coursework(self, service, course, user):
-        """Sincronizar tareas de un curso"""
-        try:
-            coursework_list = service.courses().courseWork().list(courseId=course.google_course_id).execute()
-            synced_count = 0
-            
-            for coursework_data in coursework_list.get('courseWork', []):
-                due_date = None
-                due_time = None
-                
-                if 'dueDate' in coursework_data:
-                    due_date_data = coursework_data['dueDate']
-                    due_date = datetime(
-                        due_date_data['year'],
-                        due_date_data['month'],
-                        due_date_data['day']
-                    )
-                    
-                    if 'dueTime' in coursework_data:
-                        due_time_data = coursework_data['dueTime']
-                        due_time = datetime.time(
-                            due_time_data.get('hours', 23),
-                            due_time_data.get('minutes', 59)
-                        )
-                
-                coursework, created = CourseWork.objects.update_or_create(
-                    google_coursework_id=coursework_data['id'],
-                    defaults={
-                        'course': course,
-                        'title': coursework_data['title'],
-                        'description': coursework_data.get('description', ''),
-                        'state': coursework_data['state'],
-                        'alternate_link': coursework_data['alternateLink'],
-                        'creation_time': datetime.fromisoformat(coursework_data['creationTime'].replace('Z', '+00:00')),
-                        'update_time': datetime.fromisoformat(coursework_data['updateTime'].replace('Z', '+00:00')),
-                        'due_date': due_date,
-                        'due_time': due_time,
-                        'max_points': coursework_data.get('maxPoints'),
-                        'work_type': coursework_data['workType']
-                    }
-                )
-                synced_count += 1
-            
-            return synced_count
-            
-        except Exception as e:
-            print(f"Error sincronizando tareas para {course.name}: {e}")
-            return 0
+    def get(self, request, job_id):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        if not SyncJob.objects.filter(id=job_id, user=request.user).exists():
+            return Response({'error': 'Sincronización no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        
+        phases = SyncLog.objects.filter(job_id=job_id).select_related('course').order_by('-duration_seconds')
+        sync_type = request.query_params.get('sync_type')
+        if sync_type:
+            phases = phases.filter(sync_type=sync_type)
+        
+        serializer = SyncPhaseSerializer(phases, many=True)
+        return Response(serializer.data)
+
+
+# Agrupaciones admitidas por el informe de fases más lentas
+SYNC_PHASE_GROUPS = {
+    'course': ('course_id', 'course__name'),
+    'phase': ('sync_type',),
+    'course_phase': ('course_id', 'course__name', 'sync_type'),
+}
+
+
+class SyncPhaseStatsView(APIView):
+    """Cursos y fases más lentos de las sincronizaciones recientes"""
     
-    def _sync_submissions(self, service, course, user):
-        """Sincronizar entregas de un curso"""
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        params = request.query_params
+        group = SYNC_PHASE_GROUPS.get(params.get('group', 'course_phase'))
+        if group is None:
+            raise ValidationError({'group': f'Debe ser uno de: {", ".join(SYNC_PHASE_GROUPS)}'})
         try:
-            coursework_list = CourseWork.objects.filter(course=course)
-            synced_count = 0
-            
-            for coursework in coursework_list:
-                submissions = service.courses().courseWork().studentSubmissions().list(
-                    courseId=course.google_course_id,
-                    courseWorkId=coursework.google_coursework_id
-                ).execute()
-                
-                for submission_data in submissions.get('studentSubmissions', []):
-                    # Obtener usuario por Google ID
-                    try:
-                        student_user = User.objects.get(google_id=submission_data['userId'])
-                    except User.DoesNotExist:
-                        continue
-                    
-                    submission, created = StudentSubmission.objects.update_or_create(
-                        google_submission_id=submission_data['id'],
-                        defaults={
-                            'coursework': coursework,
-                            'user': student_user,
-                            'creation_time': datetime.fromisoformat(submission_data['creationTime'].replace('Z', '+00:00')),
-                            'update_time': datetime.fromisoformat(submission_data['updateTime'].replace('Z', '+00:00')),
-                            'state': submission_data['state'],
-                            'late': submission_data.get('late', False),
-                            'draft_grade': submission_data.get('draftGrade'),
-                            'assigned_grade': submission_data.get('assignedGrade'),
-                            'alternate_link': submission_data['alternateLink']
-                        }
-                    )
-                    synced_count += 1
-            
-            return synced_count
-            
-        except Exception as e:
-            print(f"Error sincronizando entregas para {course.name}: {e}")
-            return 0
+            days = int(params.get('days', 30))
+            limit = max(1, min(int(params.get('limit', 20)), 100))
+            course_id = int(params['course_id']) if params.get('course_id') else None
+        except ValueError:
+            raise ValidationError('days, limit y course_id deben ser números enteros')
+        
+        phases = SyncLog.objects.filter(
+            job__isnull=False,
+            created_at__gte=timezone.now() - timedelta(days=days)
+        )
+        if params.get('sync_type'):
+            phases = phases.filter(sync_type=params['sync_type'])
+        if course_id is not None:
+            phases = phases.filter(course_id=course_id)
+        
+        rows = phases.values(*group).annotate(
+            runs=Count('id'),
+            avg_duration_seconds=Avg('duration_seconds'),
+            max_duration_seconds=Max('duration_seconds'),
+            total_duration_seconds=Sum('duration_seconds'),
+            avg_api_calls=Avg('api_calls'),
+            total_throttled_seconds=Sum('throttled_seconds'),
+            error_count=Count('id', filter=Q(status__in=['error', 'partial'])),
+        ).order_by('-avg_duration_seconds')[:limit]
+        
+        serializer = SyncPhaseStatsSerializer(rows, many=True)
+        return Response(serializer.data)
+
+
+def get_id_param(params, name):
+    """Leer un parámetro de ID opcional; ValidationError si no es un entero"""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Debe ser un número entero'})
 
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(SyncConditionalMixin, APIView):
     """Obtener estadísticas para el dashboard"""
     
     def get(self, request):
         if not request.user.is_authenticated:
             return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
         
+        not_modified = self.not_modified(request)
+        if not_modified:
+            return not_modified
+        
         # Filtros opcionales
         cohort = request.GET.get('cohort')
-        teacher_id = request.GET.get('teacher_id')
+        teacher_id = get_id_param(request.GET, 'teacher_id')
         
-        # Base queryset
-        courses_qs = Course.objects.filter(is_active=True)
-        if cohort:
-            courses_qs = courses_qs.filter(cohort=cohort)
-        if teacher_id:
-            courses_qs = courses_qs.filter(courseenrollment__user_id=teacher_id, courseenrollment__role='TEACHER')
-        
-        # Estadísticas básicas
-        total_courses = courses_qs.count()
-        total_students = CourseEnrollment.objects.filter(course__in=courses_qs, role='STUDENT').values('user').distinct().count()
-        total_assignments = CourseWork.objects.filter(course__in=courses_qs).count()
-        
-        # Estadísticas de entregas
-        submissions_qs = StudentSubmission.objects.filter(coursework__course__in=courses_qs)
-        total_submissions = submissions_qs.count()
-        submissions_on_time = submissions_qs.filter(late=False, state='TURNED_IN').count()
-        submissions_late = submissions_qs.filter(late=True, state='TURNED_IN').count()
-        submissions_pending = submissions_qs.filter(state__in=['NEW', 'CREATED']).count()
-        
-        completion_rate = (submissions_on_time + submissions_late) / total_submissions * 100 if total_submissions > 0 else 0
-        
-        stats = {
-            'total_courses': total_courses,
-            'total_students': total_students,
-            'total_assignments': total_assignments,
-            'total_submissions': total_submissions,
-            'submissions_on_time': submissions_on_time,
-            'submissions_late': submissions_late,
-            'submissions_pending': submissions_pending,
-            'completion_rate': round(completion_rate, 2)
-        }
-        
-        serializer = DashboardStatsSerializer(stats)
+        serializer = DashboardStatsSerializer(get_dashboard_stats(cohort, teacher_id))
         return Response(serializer.data)
 
 
-class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+def get_dashboard_stats(cohort=None, teacher_id=None):
+    """Estadísticas del dashboard desde la caché, calculándolas si no están"""
+    stats = get_dashboard_cache('stats', cohort, teacher_id)
+    if stats is None:
+        stats = compute_dashboard_stats(cohort, teacher_id)
+        set_dashboard_cache('stats', stats, cohort, teacher_id)
+    return stats
+
+
+def filter_dashboard_courses(cohort=None, teacher_id=None):
+    """Cursos activos que cumplen los filtros de cohorte y profesor del dashboard"""
+    courses_qs = Course.objects.filter(is_active=True)
+    if cohort:
+        courses_qs = courses_qs.filter(cohort=cohort)
+    if teacher_id:
+        # Subconsulta en lugar de join para no multiplicar filas al agregar
+        courses_qs = courses_qs.filter(pk__in=CourseEnrollment.objects.filter(
+            user_id=teacher_id, role='TEACHER'
+        ).values('course_id'))
+    return courses_qs
+
+
+def compute_dashboard_stats(cohort=None, teacher_id=None):
+    """Calcular las estadísticas del dashboard para una combinación de filtros"""
+    courses_qs = filter_dashboard_courses(cohort, teacher_id)
+    
+    # Estadísticas básicas
+    total_courses = courses_qs.count()
+    total_students = CourseEnrollment.objects.filter(course__in=courses_qs, role='STUDENT').values('user').distinct().count()
+    total_assignments = CourseWork.objects.filter(course__in=courses_qs).count()
+    
+    # Estadísticas de entregas desde el resumen de progreso, en un único agregado
+    submissions = StudentCourseProgress.objects.filter(course__in=courses_qs).aggregate(
+        total=Coalesce(Sum('submissions_count'), 0),
+        turned_in=Coalesce(Sum('turned_in_count'), 0),
+        late=Coalesce(Sum('late_count'), 0),
+        pending=Coalesce(Sum('pending_count'), 0),
+    )
+    total_submissions = submissions['total']
+    submissions['on_time'] = submissions['turned_in'] - submissions['late']
+    
+    completion_rate = submissions['turned_in'] / total_submissions * 100 if total_submissions > 0 else 0
+    
+    return {
+        'total_courses': total_courses,
+        'total_students': total_students,
+        'total_assignments': total_assignments,
+        'total_submissions': total_submissions,
+        'submissions_on_time': submissions['on_time'],
+        'submissions_late': submissions['late'],
+        'submissions_pending': submissions['pending'],
+        'completion_rate': round(completion_rate, 2)
+    }
+
+
+def get_ordering_param(request, allowed, default):
+    """Traducir el parámetro `ordering` a campos del queryset"""
+    ordering = request.query_params.get('ordering', '')
+    descending = ordering.startswith('-')
+    field = allowed.get(ordering.lstrip('-'))
+    if not field:
+        return default
+    return (f'-{field}', '-id') if descending else (field, 'id')
+
+
+class CourseViewSet(SyncConditionalMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet para cursos"""
     queryset = Course.objects.filter(is_active=True)
     serializer_class = CourseSerializer
+    pagination_class = CoursePagination
+    ordering_fields = {
+        'name': 'name',
+        'section': 'section',
+        'cohort': 'cohort',
+        'creation_time': 'creation_time',
+        'update_time': 'update_time',
+    }
+    
+    def get_ordering(self):
+        return get_ordering_param(self.request, self.ordering_fields, CoursePagination.ordering)
+    
+    def list(self, request, *args, **kwargs):
+        return self.not_modified(request) or super().list(request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.not_modified(request) or super().retrieve(request, *args, **kwargs)
+    
+    def get_serializer(self, *args, **kwargs):
+        """Aplicar ?fields= y ?expand=; los listados usan la representación reducida"""
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.get_serializer_class().from_request(
+            self.request, *args, list_view=self.action == 'list', **kwargs
+        )
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        cohort = self.request.query_params.get('cohort')
+        params = self.request.query_params
+        
+        # Leer solo las columnas que se van a serializar (y las del cursor de paginación)
+        ordering = [field.lstrip('-') for field in self.get_ordering()]
+        queryset = self.get_serializer().optimize_queryset(queryset, extra_fields=ordering)
+        
+        cohort = params.get('cohort')
         if cohort:
             queryset = queryset.filter(cohort=cohort)
+        
+        teacher_id = get_id_param(params, 'teacher_id')
+        if teacher_id:
+            queryset = queryset.filter(courseenrollment__user_id=teacher_id, courseenrollment__role='TEACHER')
+        
+        search = params.get('search')
+        if search:
+            queryset = queryset.filter(Q(name__icontains=search) | Q(section__icontains=search))
+        
         return queryset
+    
+    @action(detail=False, methods=['get'])
+    def progress(self, request):
+        """Progreso agregado por curso con los filtros de cohorte y profesor"""
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        not_modified = self.not_modified(request)
+        if not_modified:
+            return not_modified
+        
+        cohort = request.query_params.get('cohort')
+        teacher_id = get_id_param(request.query_params, 'teacher_id')
+        
+        progress_data = get_dashboard_cache('course_progress', cohort, teacher_id)
+        if progress_data is None:
+            progress_data = compute_course_progress(cohort, teacher_id)
+            set_dashboard_cache('course_progress', progress_data, cohort, teacher_id)
+        
+        serializer = CourseProgressSerializer(progress_data, many=True)
+        return Response(serializer.data)
+
 
+def compute_course_progress(cohort=None, teacher_id=None):
+    """Calcular el progreso por curso en una única consulta agrupada"""
+    total_assignments = Subquery(
+        CourseWork.objects.filter(course_id=OuterRef('pk'))
+        .order_by().values('course_id').annotate(value=Count('pk')).values('value')[:1],
+        output_field=IntegerField()
+    )
+    
+    courses = filter_dashboard_courses(cohort, teacher_id).annotate(
+        total_assignments=Coalesce(total_assignments, 0),
+        students_count=Count('studentcourseprogress'),
+        completed_assignments=Coalesce(Sum('studentcourseprogress__turned_in_count'), 0),
+    ).order_by('name', 'pk').values(
+        'pk', 'name', 'total_assignments', 'students_count', 'completed_assignments'
+    )
+    
+    progress_data = []
+    for course in courses:
+        # Entregas esperadas: cada estudiante debe entregar cada tarea
+        expected = course['total_assignments'] * course['students_count']
+        completion_percentage = course['completed_assignments'] / expected * 100 if expected > 0 else 0
+        progress_data.append({
+            'course_id': course['pk'],
+            'course_name': course['name'],
+            'total_assignments': course['total_assignments'],
+            'completed_assignments': course['completed_assignments'],
+            'completion_percentage': round(completion_percentage, 2),
+            'students_count': course['students_count'],
+        })
+    
+    return progress_data
 
-class StudentProgressView(APIView):
-    """Obtener progreso de estudiantes"""
+
+PROGRESS_VALUES = [
+    'id', 'user_id', 'user__google_name', 'user__google_email', 'course_id', 'course__name',
+    'total_assignments', 'turned_in_count', 'late_count', 'graded_count', 'grade_sum',
+    'completion'
+]
+
+PROGRESS_ORDERING_FIELDS = {
+    'student_name': 'user__google_name',
+    'student_email': 'user__google_email',
+    'course_name': 'course__name',
+    'completion_percentage': 'completion',
+    'late_assignments': 'late_count',
+    'completed_assignments': 'turned_in_count',
+}
+
+# Estados del filtro del dashboard expresados sobre el resumen de progreso
+PROGRESS_STATUS_FILTERS = {
+    'completed': Q(completion__gte=100),
+    'pending': Q(completion=0),
+    'late': Q(late_count__gt=0),
+    'in_progress': Q(completion__gt=0, completion__lt=100),
+}
+
+
+def filter_student_progress(params):
+    """Construir el queryset del resumen de progreso a partir de los filtros de la petición"""
+    progress_qs = StudentCourseProgress.objects.annotate(
+        completion=Case(
+            When(total_assignments__gt=0, then=F('turned_in_count') * 100.0 / F('total_assignments')),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+    )
+    
+    course_id = get_id_param(params, 'course_id')
+    if course_id:
+        progress_qs = progress_qs.filter(course_id=course_id)
+    
+    cohort = params.get('cohort')
+    if cohort:
+        progress_qs = progress_qs.filter(course__cohort=cohort)
+    
+    teacher_id = get_id_param(params, 'teacher_id')
+    if teacher_id:
+        progress_qs = progress_qs.filter(
+            course__courseenrollment__user_id=teacher_id,
+            course__courseenrollment__role='TEACHER'
+        )
+    
+    search = params.get('search')
+    if search:
+        progress_qs = progress_qs.filter(
+            Q(user__google_name__icontains=search) | Q(user__google_email__icontains=search)
+        )
+    
+    status_filter = PROGRESS_STATUS_FILTERS.get(params.get('status'))
+    if status_filter is not None:
+        progress_qs = progress_qs.filter(status_filter)
+    
+    # Umbrales numéricos opcionales
+    thresholds = {
+        'min_completion': 'completion__gte',
+        'max_completion': 'completion__lte',
+        'min_late': 'late_count__gte',
+        'max_late': 'late_count__lte',
+    }
+    for param, lookup in thresholds.items():
+        value = params.get(param)
+        if value not in (None, ''):
+            try:
+                progress_qs = progress_qs.filter(**{lookup: float(value)})
+            except ValueError:
+                raise ValidationError({param: 'Debe ser un número'})
+    
+    return progress_qs
+
+
+def build_student_progress(row):
+    """Convertir una fila del resumen de progreso al formato de StudentProgressSerializer"""
+    total_assignments = row['total_assignments']
+    completion_percentage = (row['turned_in_count'] / total_assignments * 100) if total_assignments > 0 else 0
+    average_grade = row['grade_sum'] / row['graded_count'] if row['graded_count'] else None
+    
+    return {
+        'student_id': row['user_id'],
+        'student_name': row['user__google_name'],
+        'student_email': row['user__google_email'],
+        'course_id': row['course_id'],
+        'course_name': row['course__name'],
+        'total_assignments': total_assignments,
+        'completed_assignments': row['turned_in_count'],
+        'late_assignments': row['late_count'],
+        'completion_percentage': round(completion_percentage, 2),
+        'average_grade': round(average_grade, 2) if average_grade else None
+    }
+
+
+class StudentProgressView(SyncConditionalMixin, generics.GenericAPIView):
+    """Obtener progreso de estudiantes, paginado por cursor"""
+    pagination_class = StudentProgressPagination
+    
+    def get_ordering(self):
+        return get_ordering_param(self.request, PROGRESS_ORDERING_FIELDS, StudentProgressPagination.ordering)
     
     def get(self, request):
         if not request.user.is_authenticated:
             return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Filtros
-        course_id = request.GET.get('course_id')
-        cohort = request.GET.get('cohort')
+        not_modified = self.not_modified(request)
+        if not_modified:
+            return not_modified
         
-        # Base queryset
-        enrollments_qs = CourseEnrollment.objects.filter(role='STUDENT')
+        # El resumen precalculado por la sincronización evita recorrer las entregas
+        progress_qs = filter_student_progress(request.query_params).values(*PROGRESS_VALUES)
         
-        if course_id:
-            enrollments_qs = enrollments_qs.filter(course_id=course_id)
+        page = self.paginate_queryset(progress_qs)
+        serializer = StudentProgressSerializer([build_student_progress(row) for row in page], many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+# Los cursores de las primeras páginas del bootstrap continúan en estos endpoints
+STUDENT_PROGRESS_PATH = '/api/students/progress/'
+COURSES_PATH = '/api/courses/'
+TEACHERS_PATH = '/api/teachers/'
+
+# Campos que necesitan los selectores de filtros del dashboard
+FILTER_COURSE_FIELDS = ['id', 'name', 'section', 'cohort']
+FILTER_TEACHER_FIELDS = ['id', 'google_name', 'google_email', 'google_picture']
+
+
+def paginate_filter_options(request, queryset, pagination_class, path, serialize):
+    """Primera página de las opciones de un filtro con el cursor del endpoint que la continúa"""
+    paginator = pagination_class()
+    # El page_size de la petición es el de la página de progreso
+    paginator.page_size_query_param = None
+    page = paginator.paginate_queryset(queryset, request)
+    paginator.base_url = request.build_absolute_uri(path)
+    return paginator.get_paginated_response(serialize(page)).data
+
+
+class DashboardBootstrapView(generics.GenericAPIView):
+    """Carga inicial del dashboard en una sola respuesta"""
+    pagination_class = StudentProgressPagination
+    
+    def get_ordering(self):
+        return get_ordering_param(self.request, PROGRESS_ORDERING_FIELDS, StudentProgressPagination.ordering)
+    
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        params = request.query_params
+        stats = get_dashboard_stats(params.get('cohort'), get_id_param(params, 'teacher_id'))
+        
+        progress_qs = filter_student_progress(params).values(*PROGRESS_VALUES)
+        page = self.paginate_queryset(progress_qs)
+        self.paginator.base_url = request.build_absolute_uri(
+            f'{STUDENT_PROGRESS_PATH}?{params.urlencode()}' if params else STUDENT_PROGRESS_PATH
+        )
+        progress = self.get_paginated_response(
+            StudentProgressSerializer([build_student_progress(row) for row in page], many=True).data
+        ).data
+        
+        # Mismo orden y conjunto que /api/courses/ y /api/teachers/ sin filtros
+        active_courses = Course.objects.filter(is_active=True)
+        courses = paginate_filter_options(
+            request,
+            CourseSerializer(fields=FILTER_COURSE_FIELDS).optimize_queryset(
+                active_courses, extra_fields=CoursePagination.ordering
+            ),
+            CoursePagination,
+            f"{COURSES_PATH}?fields={','.join(FILTER_COURSE_FIELDS)}",
+            lambda page: CourseSerializer(page, many=True, fields=FILTER_COURSE_FIELDS).data
+        )
+        teachers = paginate_filter_options(
+            request,
+            UserSerializer(fields=FILTER_TEACHER_FIELDS).optimize_queryset(
+                User.objects.filter(pk__in=CourseEnrollment.objects.filter(
+                    role='TEACHER', course__in=active_courses
+                ).values('user_id'))
+            ),
+            TeacherPagination,
+            TEACHERS_PATH,
+            lambda page: UserSerializer(page, many=True, fields=FILTER_TEACHER_FIELDS).data
+        )
+        
+        return Response({
+            'user': UserSerializer(request.user).data,
+            'stats': DashboardStatsSerializer(stats).data,
+            'progress': progress,
+            'courses': courses,
+            'teachers': teachers,
+        })
+
+
+def subquery_count(queryset, field='pk', distinct=False):
+    """Contar las filas de un queryset correlacionado como subconsulta escalar"""
+    template = '%(function)s(DISTINCT %(expressions)s)' if distinct else '%(function)s(%(expressions)s)'
+    count = Func(F(field), function='COUNT', template=template, output_field=IntegerField())
+    return Subquery(
+        queryset.order_by().annotate(value=count).values('value')[:1],
+        output_field=IntegerField()
+    )
+
+
+class TeacherListView(generics.GenericAPIView):
+    """Listar profesores con su carga de clases, paginado por cursor"""
+    pagination_class = TeacherPagination
+    ordering_fields = {
+        'name': 'google_name',
+        'email': 'google_email',
+        'courses_count': 'courses_count',
+        'students_count': 'students_count',
+        'pending_grading_count': 'pending_grading_count',
+    }
+    
+    def get_ordering(self):
+        return get_ordering_param(self.request, self.ordering_fields, TeacherPagination.ordering)
+    
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        cohort = request.query_params.get('cohort')
+        search = request.query_params.get('search')
+        
+        teachings = CourseEnrollment.objects.filter(role='TEACHER', course__is_active=True)
         if cohort:
-            enrollments_qs = enrollments_qs.filter(course__cohort=cohort)
+            teachings = teachings.filter(course__cohort=cohort)
         
-        progress_data = []
+        # Cursos del profesor de la fila externa
+        taught_courses = teachings.filter(user_id=OuterRef(OuterRef('pk'))).values('course_id')
         
-        for enrollment in enrollments_qs:
-            course = enrollment.course
-            student = enrollment.user
-            
-            # Obtener estadísticas del estudiante en este curso
-            total_assignments = CourseWork.objects.filter(course=course).count()
-            submissions = StudentSubmission.objects.filter(
-                coursework__course=course,
-                user=student
+        teachers_qs = User.objects.filter(pk__in=teachings.values('user_id')).annotate(
+            courses_count=subquery_count(teachings.filter(user_id=OuterRef('pk'))),
+            students_count=subquery_count(
+                CourseEnrollment.objects.filter(role='STUDENT', course_id__in=taught_courses),
+                field='user_id',
+                distinct=True
+            ),
+            pending_grading_count=subquery_count(
+                StudentSubmission.objects.filter(
+                    coursework__course_id__in=taught_courses,
+                    state='TURNED_IN',
+                    assigned_grade__isnull=True
+                )
+            ),
+        ).only('id', 'google_name', 'google_email', 'google_picture')
+        
+        if search:
+            teachers_qs = teachers_qs.filter(
+                Q(google_name__icontains=search) | Q(google_email__icontains=search)
             )
-            
-            completed_assignments = submissions.filter(state='TURNED_IN').count()
-            late_assignments = submissions.filter(late=True, state='TURNED_IN').count()
-            
-            completion_percentage = (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
-            
-            # Promedio de calificaciones
-            grades = submissions.filter(assigned_grade__isnull=False).values_list('assigned_grade', flat=True)
-            average_grade = sum(grades) / len(grades) if grades else None
-            
-            progress_data.append({
-                'student_id': student.id,
-                'student_name': student.google_name,
-                'student_email': student.google_email,
-                'course_name': course.name,
-                'total_assignments': total_assignments,
-                'completed_assignments': completed_assignments,
-                'late_assignments': late_assignments,
-                'completion_percentage': round(completion_percentage, 2),
-                'average_grade': round(average_grade, 2) if average_grade else None
-            })
-        
-        serializer = StudentProgressSerializer(progress_data, many=True)
-        return Response(serializer.data)
+        
+        page = self.paginate_queryset(teachers_qs)
+        serializer = TeacherSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ExportStudentProgressView(APIView):
+    """Exportar a CSV el progreso de estudiantes con los filtros del dashboard"""
+    
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        fields = [
+            'student_id', 'student_name', 'student_email', 'course_id', 'course_name',
+            'total_assignments', 'completed_assignments', 'late_assignments',
+            'completion_percentage', 'average_grade'
+        ]
+        progress_rows = filter_student_progress(request.query_params).order_by('pk').values(
+            *PROGRESS_VALUES
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        
+        rows = (
+            [progress[field] for field in fields]
+            for progress in map(build_student_progress, progress_rows)
+        )
+        return stream_csv('progreso-estudiantes.csv', fields, rows)
+
+
+class ExportSubmissionsView(APIView):
+    """Exportar a CSV las entregas con los filtros del dashboard"""
+    
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        params = request.query_params
+        # Validar los IDs antes de empezar a enviar la respuesta
+        course_id = get_id_param(params, 'course_id')
+        teacher_id = get_id_param(params, 'teacher_id')
+        
+        submissions_qs = StudentSubmission.objects.filter(
+            coursework__course__in=filter_dashboard_courses(params.get('cohort'), teacher_id)
+        )
+        if course_id:
+            submissions_qs = submissions_qs.filter(coursework__course_id=course_id)
+        if params.get('state'):
+            submissions_qs = submissions_qs.filter(state=params['state'])
+        
+        header = [
+            'google_submission_id', 'course_name', 'coursework_title', 'student_name',
+            'student_email', 'state', 'late', 'draft_grade', 'assigned_grade', 'update_time'
+        ]
+        rows = submissions_qs.order_by('pk').values_list(
+            'google_submission_id', 'coursework__course__name', 'coursework__title',
+            'user__google_name', 'user__google_email', 'state', 'late',
+            'draft_grade', 'assigned_grade', 'update_time'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv('entregas.csv', header, rows)
+
+
+class ExportCourseWorkView(APIView):
+    """Exportar a CSV las tareas con los filtros del dashboard"""
+    
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        params = request.query_params
+        # Validar los IDs antes de empezar a enviar la respuesta
+        course_id = get_id_param(params, 'course_id')
+        teacher_id = get_id_param(params, 'teacher_id')
+        
+        coursework_qs = CourseWork.objects.filter(
+            course__in=filter_dashboard_courses(params.get('cohort'), teacher_id)
+        )
+        if course_id:
+            coursework_qs = coursework_qs.filter(course_id=course_id)
+        
+        header = [
+            'google_coursework_id', 'course_name', 'title', 'work_type', 'state',
+            'due_date', 'due_time', 'max_points', 'update_time'
+        ]
+        rows = coursework_qs.order_by('pk').values_list(
+            'google_coursework_id', 'course__name', 'title', 'work_type', 'state',
+            'due_date', 'due_time', 'max_points', 'update_time'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv('tareas.csv', header, rows)